@@ -0,0 +1,105 @@
+import functools
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import FileResponse
+
+from .constants import PDF_SPOOL_MAX_SIZE
+from .views import IngredientViewSet, RecipeViewSet
+from recipes.shortlinks import decode
+from recipes.views import recipe_redirect
+
+
+def database_sync_to_async(func):
+    """
+    Выполняет синхронный код с обращениями к базе в пуле потоков,
+    а не в единственном общем потоке, куда Django 3.2 отправляет все
+    синхронные представления под ASGI. Соединения потока закрываются
+    по тем же правилам, что и в конце обычного запроса.
+    """
+
+    def inner(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(inner, thread_sensitive=False)
+
+
+def _spool(response):
+    """
+    Django 3.2 перебирает потоковый ответ прямо в цикле событий,
+    где обращения к базе запрещены, поэтому он собирается во временный
+    файл ещё в рабочем потоке.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE)
+    for chunk in response.streaming_content:
+        buffer.write(chunk)
+    buffer.seek(0)
+    spooled = FileResponse(buffer, status=response.status_code)
+    for header, value in response.items():
+        spooled[header] = value
+    return spooled
+
+
+def _render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    if response.streaming and not isinstance(response, FileResponse):
+        response = _spool(response)
+    return response
+
+
+def async_view(view):
+    """Асинхронная обёртка над синхронным представлением DRF."""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await database_sync_to_async(_render)(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+# Параметры совпадают с теми, что передаёт DefaultRouter в api/urls.py.
+recipe_list = async_view(
+    RecipeViewSet.as_view(
+        {"get": "list", "post": "create"}, basename="recipe", detail=False
+    )
+)
+recipe_detail = async_view(
+    RecipeViewSet.as_view(
+        {
+            "get": "retrieve",
+            "put": "update",
+            "patch": "partial_update",
+            "delete": "destroy",
+        },
+        basename="recipe",
+        detail=True,
+    )
+)
+recipe_shopping_cart = async_view(
+    RecipeViewSet.as_view(
+        {"get": "download_shopping_cart"}, basename="recipe", detail=False
+    )
+)
+ingredient_list = async_view(
+    IngredientViewSet.as_view({"get": "list"}, basename="ingredient", detail=False)
+)
+ingredient_detail = async_view(
+    IngredientViewSet.as_view({"get": "retrieve"}, basename="ingredient", detail=True)
+)
+
+
+async def short_link_redirect(request, code):
+    """Вариант recipes.views.short_link_redirect для ASGI."""
+    return await database_sync_to_async(recipe_redirect)(decode(code))
+
+
+async def legacy_short_link_redirect(request, pk):
+    """Вариант recipes.views.legacy_short_link_redirect для ASGI."""
+    return await database_sync_to_async(recipe_redirect)(pk)
@@ -0,0 +1,76 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.cache import increment_counter
+
+CACHE_PREFIX = "recipes"
+GLOBAL_VERSION_KEY = f"{CACHE_PREFIX}:version"
+USER_VERSION_KEY = f"{CACHE_PREFIX}:user:{{}}:version"
+HITS_KEY = f"{CACHE_PREFIX}:stats:hits"
+MISSES_KEY = f"{CACHE_PREFIX}:stats:misses"
+
+
+def invalidate_all():
+    """Сбрасывает закешированные ответы ленты для всех пользователей."""
+    increment_counter(GLOBAL_VERSION_KEY)
+
+
+def invalidate_user(user_id):
+    """Сбрасывает закешированные ответы ленты одного пользователя."""
+    increment_counter(USER_VERSION_KEY.format(user_id))
+
+
+def _build_key(request):
+    user = request.user
+    version_keys = [GLOBAL_VERSION_KEY]
+    if user.is_authenticated:
+        version_keys.append(USER_VERSION_KEY.format(user.pk))
+    versions = cache.get_many(version_keys)
+    user_part = (
+        f"{user.pk}.{versions.get(version_keys[-1], 0)}"
+        if user.is_authenticated
+        else "anon"
+    )
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return (
+        f"{CACHE_PREFIX}:response:{versions.get(GLOBAL_VERSION_KEY, 0)}:"
+        f"{user_part}:{request.get_host()}{request.path}?{query}"
+    )
+
+
+def cached_response(request, build_response):
+    """
+    Возвращает ответ из кеша или строит его и сохраняет.
+    Кешируются только успешные ответы.
+    """
+    key = _build_key(request)
+    data = cache.get(key)
+    if data is not None:
+        increment_counter(HITS_KEY)
+        response = Response(data)
+        response["X-Cache"] = "HIT"
+        return response
+
+    increment_counter(MISSES_KEY)
+    response = build_response()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(key, response.data, settings.RECIPES_CACHE_TIMEOUT)
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def get_stats():
+    """Возвращает счётчики попаданий и промахов кеша ленты."""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total else 0.0,
+    }
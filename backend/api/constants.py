@@ -1 +1,33 @@
 MIN_AMOUNT_OF_INGREDIENTS = 1
+SHOPPING_CART_CHUNK_SIZE = 100
+PDF_SPOOL_MAX_SIZE = 1024 * 1024
+SHOPPING_CART_EXPORT_CACHE_SIZE = 32 * 1024 * 1024
+SHOPPING_CART_EXPORT_MAX_ENTRY_SIZE = 2 * 1024 * 1024
+EXPORT_WORKER_POLL_INTERVAL = 2
+EXPORT_JOB_TTL_HOURS = 24
+# Задание в работе дольше этого времени брошено упавшим обработчиком.
+EXPORT_JOB_TIMEOUT_MINUTES = 15
+# Журнал изменённых рецептов для индексов подбора в других процессах:
+# при большем отставании или потерянной записи индекс перестраивается.
+RECIPE_MATCH_CHANGE_LOG_SIZE = 1000
+RECIPE_MATCH_CHANGE_LOG_TTL = 24 * 60 * 60
+# Поля автора, которые выводятся в карточках рецептов.
+AUTHOR_FEED_FIELDS = frozenset(
+    ("email", "username", "first_name", "last_name", "avatar")
+)
+METRICS_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS_QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+# Импорт по HTTP выполняется в запросе; большие выгрузки — командой import_recipes.
+RECIPE_IMPORT_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_JPEG_QUALITY = 85
+IMAGE_WEBP_QUALITY = 80
+RECIPE_IMAGE_MAX_SIZE = 1600
+RECIPE_IMAGE_VARIANTS = {"thumb": 480, "large": RECIPE_IMAGE_MAX_SIZE}
+AVATAR_MAX_SIZE = 512
+AVATAR_VARIANTS = {"thumb": 128}
+IMAGE_SPOOL_MAX_SIZE = 1024 * 1024
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Prefetch, Q, Sum, prefetch_related_objects
+from django.utils import timezone
+
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartExport,
+)
+from .constants import (
+    EXPORT_JOB_TIMEOUT_MINUTES,
+    PDF_SPOOL_MAX_SIZE,
+    SHOPPING_CART_CHUNK_SIZE,
+    SHOPPING_CART_EXPORT_CACHE_SIZE,
+    SHOPPING_CART_EXPORT_MAX_ENTRY_SIZE,
+)
+from .ingredient_index import VERSION_KEY as INGREDIENTS_VERSION_KEY
+from .pdf import BOLD_FONT, MEDIUM_FONT, PdfRenderer
+
+logger = logging.getLogger(__name__)
+EXPORT_FAILED_MESSAGE = "Не удалось сформировать файл. Попробуйте ещё раз."
+
+
+def cart_recipes(user):
+    """Рецепты из корзины пользователя."""
+    return Recipe.objects.filter(added_to_carts__user=user)
+
+
+def cart_ingredients(user):
+    """Суммарное количество каждого ингредиента по всей корзине одним запросом."""
+    return (
+        Ingredient.objects.filter(
+            ingredient_in_recipes__recipe__added_to_carts__user=user
+        )
+        .values("name", "measurement_unit")
+        .annotate(total_amount=Sum("ingredient_in_recipes__amount"))
+        .order_by("name")
+    )
+
+
+def current_date():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def cart_fingerprint(user, file_type):
+    """
+    Возвращает хеш содержимого корзины или None, если корзина пуста.
+
+    Учитываются рецепты корзины, время их изменения, имена авторов
+    и версия каталога ингредиентов.
+    """
+    rows = list(
+        ShoppingCart.objects.filter(user=user)
+        .order_by("recipe_id")
+        .values_list("recipe_id", "recipe__updated_at", "recipe__author__username")
+    )
+    if not rows:
+        return None
+    digest = hashlib.sha256(file_type.encode())
+    digest.update(str(cache.get(INGREDIENTS_VERSION_KEY, 0)).encode())
+    for recipe_id, updated_at, username in rows:
+        digest.update(f"|{recipe_id}:{updated_at.isoformat()}:{username}".encode())
+    return digest.hexdigest()
+
+
+class ExportCache:
+    """
+    Процессный LRU-кеш готовых файлов списка покупок,
+    ограниченный суммарным размером в байтах.
+    """
+
+    def __init__(self, max_size=SHOPPING_CART_EXPORT_CACHE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        if len(data) > SHOPPING_CART_EXPORT_MAX_ENTRY_SIZE:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def caching_iterator(self, key, chunks, encoding="utf-8"):
+        """
+        Отдаёт части ответа по мере генерации и сохраняет итог в кеш,
+        если он не превысил допустимый размер записи.
+        """
+        parts = []
+        size = 0
+        for chunk in chunks:
+            data = chunk.encode(encoding)
+            if parts is not None:
+                size += len(data)
+                if size > SHOPPING_CART_EXPORT_MAX_ENTRY_SIZE:
+                    parts = None
+                else:
+                    parts.append(data)
+            yield data
+        if parts is not None:
+            self.set(key, b"".join(parts))
+
+
+export_cache = ExportCache()
+
+
+def iter_cart_recipes(recipes, chunk_size=SHOPPING_CART_CHUNK_SIZE):
+    """
+    Итерирует рецепты корзины порциями, подгружая ингредиенты для каждой
+    порции отдельно, чтобы в памяти не было всей корзины сразу.
+    """
+    chunk = []
+    for recipe in recipes.select_related("author").iterator(chunk_size=chunk_size):
+        chunk.append(recipe)
+        if len(chunk) == chunk_size:
+            yield from _with_ingredients(chunk)
+            chunk = []
+    if chunk:
+        yield from _with_ingredients(chunk)
+
+
+def _with_ingredients(chunk):
+    prefetch_related_objects(
+        chunk,
+        Prefetch(
+            "recipe_ingredients",
+            queryset=RecipeIngredient.objects.select_related("ingredient"),
+        ),
+    )
+    return chunk
+
+
+def _recipe_lines(recipe):
+    yield f"Автор: {recipe.author.username}"
+    yield f"Рецепт: {recipe.name}"
+    yield f"Текст: {recipe.text}"
+    yield f"Время приготовления: {recipe.cooking_time} мин."
+    yield "Ингредиенты:"
+    for ri in recipe.recipe_ingredients.all():
+        yield f"- {ri.ingredient.name} - {ri.amount} {ri.ingredient.measurement_unit}"
+
+
+def iter_txt(recipes, ingredients, current_date):
+    """Построчно формирует текстовый список покупок."""
+    yield f"Корзина покупок (создана: {current_date}):\n\n"
+    recipes_count = 0
+    for recipe in iter_cart_recipes(recipes):
+        recipes_count += 1
+        for line in _recipe_lines(recipe):
+            yield f"{line}\n"
+        yield "\n"
+    yield f"Всего рецептов в корзине: {recipes_count}\n\n"
+    yield "Список ингредиентов для покупки:\n"
+    for ing in ingredients.iterator():
+        yield f"- {ing['name']} - {ing['total_amount']} {ing['measurement_unit']}\n"
+
+
+def write_pdf(output, recipes, ingredients, current_date):
+    """Записывает PDF со списком покупок в файловый объект."""
+    renderer = PdfRenderer(output)
+    renderer.text(f"Корзина покупок (создана: {current_date}):", BOLD_FONT, 15)
+    renderer.spacer(10)
+    recipes_count = 0
+    for recipe in iter_cart_recipes(recipes):
+        recipes_count += 1
+        lines = _recipe_lines(recipe)
+        renderer.text(next(lines), MEDIUM_FONT)
+        renderer.text(next(lines), MEDIUM_FONT)
+        for line in lines:
+            renderer.text(line)
+        renderer.spacer(10)
+    renderer.text(f"Всего рецептов в корзине: {recipes_count}", BOLD_FONT)
+    renderer.text("Список ингредиентов для покупки:", BOLD_FONT)
+    for ing in ingredients.iterator():
+        renderer.text(
+            f"{ing['name']} - {ing['total_amount']} {ing['measurement_unit']}"
+        )
+    renderer.save()
+
+
+def write_export(output, user, file_type):
+    """Записывает список покупок пользователя в файл выбранного формата."""
+    recipes = cart_recipes(user)
+    ingredients = cart_ingredients(user)
+    if file_type == "pdf":
+        write_pdf(output, recipes, ingredients, current_date())
+        return
+    for line in iter_txt(recipes, ingredients, current_date()):
+        output.write(line.encode("utf-8"))
+
+
+def claim_export_job():
+    """
+    Забирает из очереди самое старое задание и переводит его в работу.
+    Заблокированные другими обработчиками строки пропускаются.
+    """
+    with transaction.atomic():
+        job = (
+            ShoppingCartExport.objects.select_for_update(skip_locked=True)
+            .filter(status=ShoppingCartExport.PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ShoppingCartExport.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def stale_export_cutoff():
+    """Задания, взятые в работу раньше этого времени, считаются брошенными."""
+    return timezone.now() - timedelta(minutes=EXPORT_JOB_TIMEOUT_MINUTES)
+
+
+def fail_stale_export_jobs():
+    """
+    Завершает ошибкой задания, обработчик которых упал, не записав
+    результат; следующий запрос выгрузки создаст новое задание.
+    """
+    # Задания без started_at взяты в работу до появления этого поля.
+    return ShoppingCartExport.objects.filter(
+        Q(started_at__lt=stale_export_cutoff()) | Q(started_at__isnull=True),
+        status=ShoppingCartExport.RUNNING,
+    ).update(
+        status=ShoppingCartExport.FAILED,
+        error=EXPORT_FAILED_MESSAGE,
+        finished_at=timezone.now(),
+    )
+
+
+def process_export_job(job):
+    """Генерирует файл для задания и сохраняет результат или ошибку."""
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE) as buffer:
+            write_export(buffer, job.user, job.file_type)
+            buffer.seek(0)
+            job.file.save(
+                f"{job.fingerprint}.{job.file_type}", File(buffer), save=False
+            )
+        job.status = ShoppingCartExport.DONE
+    except Exception:
+        logger.exception("Ошибка выгрузки списка покупок %s", job.pk)
+        job.status = ShoppingCartExport.FAILED
+        job.error = EXPORT_FAILED_MESSAGE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["file", "status", "error", "finished_at"])
+    return job
@@ -18,6 +18,7 @@ class RecipeFilter(filters.FilterSet):
 
     is_in_shopping_cart = filters.NumberFilter(method="filter_in_shopping_cart")
     is_favorited = filters.NumberFilter(method="filter_is_favorited")
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Recipe
@@ -40,3 +41,9 @@ class RecipeFilter(filters.FilterSet):
         ):
             return queryset.filter(marked_as_favorite__user=self.request.user)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return queryset.search(value)
@@ -0,0 +1,202 @@
+import binascii
+import io
+import re
+import tempfile
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from .constants import (
+    BASE64_DECODE_CHUNK_SIZE,
+    IMAGE_JPEG_QUALITY,
+    IMAGE_MAX_PIXELS,
+    IMAGE_MAX_UPLOAD_SIZE,
+    IMAGE_SPOOL_MAX_SIZE,
+    IMAGE_WEBP_QUALITY,
+)
+
+# Форматы, в которых сохраняется оригинал; остальные перекодируются в PNG.
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+INVALID_IMAGE_MESSAGE = "Загрузите корректное изображение."
+TOO_LARGE_MESSAGE = (
+    f"Размер изображения не должен превышать "
+    f"{IMAGE_MAX_UPLOAD_SIZE // (1024 * 1024)} МБ."
+)
+WHITESPACE = re.compile(r"\s")
+# Заголовок data:image/...;base64, ищется только в начале строки.
+MAX_DATA_URI_HEADER_LENGTH = 100
+
+
+def variant_name(name, variant):
+    """Имя файла варианта: recipes/images/abc.jpg -> recipes/images/abc.thumb.webp."""
+    return f"{name.rsplit('.', 1)[0]}.{variant}.webp"
+
+
+def variant_url(field_file, variant):
+    """
+    URL варианта изображения или оригинала, если вариант не указан.
+    Наличие файла варианта не проверяется: варианты создаются при каждой
+    записи картинки (ensure_variants) и при запуске контейнера.
+    """
+    if not field_file:
+        return ""
+    if variant is None:
+        return field_file.url
+    return field_file.storage.url(variant_name(field_file.name, variant))
+
+
+def save_variants(field_file, image_file, overwrite=False):
+    """
+    Сохраняет рядом с сохранённым оригиналом его заранее подготовленные варианты.
+    Варианты уже сохранённого ранее оригинала не перезаписываются,
+    если не указан overwrite.
+    """
+    for variant, data in getattr(image_file, "variants", {}).items():
+        name = variant_name(field_file.name, variant)
+        if field_file.storage.exists(name):
+            if not overwrite:
+                continue
+            field_file.storage.delete(name)
+        field_file.storage.save(name, ContentFile(data))
+
+
+def ensure_variants(field_file, max_size, variants, overwrite=False):
+    """
+    Создаёт недостающие варианты уже сохранённой картинки из её оригинала.
+    Возвращает True, если картинка обрабатывалась.
+    """
+    if not field_file:
+        return False
+    if not overwrite and all(
+        field_file.storage.exists(variant_name(field_file.name, variant))
+        for variant in variants
+    ):
+        return False
+    with field_file.open("rb") as source:
+        processed = process_image(source, max_size, variants)
+    save_variants(field_file, processed, overwrite=overwrite)
+    return True
+
+
+def _encode(image, image_format):
+    output = io.BytesIO()
+    if image_format == "JPEG":
+        image.save(output, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    elif image_format == "WEBP":
+        image.save(output, "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+    else:
+        image.save(output, image_format, optimize=True)
+    return output.getvalue()
+
+
+def decode_base64(data, start=0):
+    """
+    Декодирует base64, начиная с позиции start, порциями во временный файл,
+    который уходит на диск после IMAGE_SPOOL_MAX_SIZE байт, — ни строка,
+    ни декодированная картинка целиком в памяти не копируются.
+    """
+    if WHITESPACE.search(data, start):
+        data, start = WHITESPACE.sub("", data[start:]), 0
+    output = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_SIZE)
+    try:
+        for offset in range(start, len(data), BASE64_DECODE_CHUNK_SIZE):
+            output.write(
+                binascii.a2b_base64(data[offset:offset + BASE64_DECODE_CHUNK_SIZE])
+            )
+    except (binascii.Error, ValueError):
+        output.close()
+        raise serializers.ValidationError(INVALID_IMAGE_MESSAGE)
+    output.seek(0)
+    return output
+
+
+def _open(source, max_size):
+    try:
+        image = Image.open(source)
+        if image.width * image.height > IMAGE_MAX_PIXELS:
+            raise serializers.ValidationError(
+                "Изображение слишком большое по количеству пикселей."
+            )
+        image_format = image.format
+        if image_format == "JPEG":
+            # Декодер JPEG сразу уменьшает картинку кратно 1/2..1/8.
+            image.draft("RGB", (max_size, max_size))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise serializers.ValidationError(INVALID_IMAGE_MESSAGE)
+    return image, image_format
+
+
+def process_image(source, max_size, variants=None):
+    """
+    Декодирует изображение из файлового объекта один раз, применяет поворот
+    из EXIF, удаляет метаданные и уменьшает до max_size по большей стороне.
+    Варианты WebP
+    (имя -> максимальный размер) готовятся сразу и сохраняются позже
+    функцией save_variants.
+    """
+    image, image_format = _open(source, max_size)
+    image = ImageOps.exif_transpose(image)
+    if image_format not in FORMAT_EXTENSIONS:
+        image_format = "PNG"
+    if image_format == "JPEG":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA")
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+    content = ContentFile(
+        _encode(image, image_format),
+        name=f"{uuid.uuid4()}.{FORMAT_EXTENSIONS[image_format]}",
+    )
+    content.variants = {}
+    for variant, size in (variants or {}).items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        content.variants[variant] = _encode(resized, "WEBP")
+    return content
+
+
+class ProcessedImageField(Base64ImageField):
+    """
+    Изображение в base64 или файл из multipart/form-data, которое
+    при загрузке проходит process_image.
+    При выводе возвращает URL варианта, заданного параметром variant
+    или ключом image_variant в контексте сериализатора.
+    """
+
+    def __init__(self, *args, max_size=None, variants=None, variant=None, **kwargs):
+        self.max_size = max_size
+        self.variants = variants
+        self.variant = variant
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if data in self.EMPTY_VALUES:
+            return None
+        if isinstance(data, UploadedFile):
+            # multipart/form-data: файл уже лежит во временном файле.
+            if data.size > IMAGE_MAX_UPLOAD_SIZE:
+                raise serializers.ValidationError(TOO_LARGE_MESSAGE)
+            return process_image(data, self.max_size, self.variants)
+        if not isinstance(data, str):
+            raise serializers.ValidationError(INVALID_IMAGE_MESSAGE)
+        header_end = data.find(";base64,", 0, MAX_DATA_URI_HEADER_LENGTH)
+        start = header_end + len(";base64,") if header_end != -1 else 0
+        if (len(data) - start) * 3 // 4 > IMAGE_MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(TOO_LARGE_MESSAGE)
+        with decode_base64(data, start) as source:
+            return process_image(source, self.max_size, self.variants)
+
+    def to_representation(self, file):
+        variant = self.variant or self.context.get("image_variant")
+        if not file or variant is None:
+            return super().to_representation(file)
+        url = variant_url(file, variant)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,79 @@
+import json
+import threading
+from bisect import bisect_left, bisect_right
+
+from django.core.cache import cache
+
+from recipes.cache import increment_counter
+from recipes.models import Ingredient
+
+VERSION_KEY = "ingredients:version"
+MAX_CHAR = chr(0x10FFFF)
+
+
+class IngredientIndex:
+    """
+    Процессный индекс ингредиентов для поиска по началу названия.
+
+    Хранит отсортированные по названию ключи и заранее сериализованный JSON
+    каждого ингредиента. Индекс строится при первом обращении и
+    перестраивается, когда версия каталога в общем кеше меняется.
+    Версия, ключи и записи хранятся одним неизменяемым кортежем, который
+    заменяется целиком, поэтому поиск без блокировки видит согласованный индекс.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = (None, (), ())
+
+    def _build(self, version):
+        rows = sorted(
+            (name.casefold(), name, pk, unit)
+            for pk, name, unit in Ingredient.objects.order_by().values_list(
+                "id", "name", "measurement_unit"
+            )
+        )
+        keys = tuple(row[0] for row in rows)
+        entries = tuple(
+            json.dumps(
+                {"id": pk, "name": name, "measurement_unit": unit},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode("utf-8")
+            for _, name, pk, unit in rows
+        )
+        return version, keys, entries
+
+    def _current(self):
+        version = cache.get(VERSION_KEY, 0)
+        index = self._index
+        if index[0] == version:
+            return index
+        with self._lock:
+            if self._index[0] != version:
+                self._index = self._build(version)
+            return self._index
+
+    def invalidate(self):
+        """
+        Помечает индекс устаревшим во всех процессах. Вызывается после
+        фиксации транзакции, иначе индекс может перестроиться по старым данным.
+        """
+        increment_counter(VERSION_KEY)
+
+    def search(self, prefix="", limit=None):
+        """Возвращает JSON-представления ингредиентов с заданным началом названия."""
+        _, keys, entries = self._current()
+        prefix = prefix.casefold()
+        start = bisect_left(keys, prefix)
+        end = bisect_right(keys, prefix + MAX_CHAR, lo=start) if prefix else len(keys)
+        if limit is not None:
+            end = min(end, start + limit)
+        return list(entries[start:end])
+
+    def render(self, prefix="", limit=None):
+        """Собирает готовое тело JSON-ответа со списком ингредиентов."""
+        return b"[" + b",".join(self.search(prefix, limit)) + b"]"
+
+
+ingredient_index = IngredientIndex()
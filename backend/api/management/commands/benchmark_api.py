@@ -0,0 +1,163 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe
+from recipes.seeding import seed_data
+from users.models import User
+
+ENDPOINTS = (
+    "recipe_list",
+    "recipe_detail",
+    "subscriptions",
+    "ingredient_search",
+    "shopping_cart_txt",
+    "shopping_cart_pdf",
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон основных эндпоинтов API внутри процесса: "
+        "задержка p50/p95, число SQL-запросов на запрос и пропускная способность. "
+        "С --seed данные создаются во временной транзакции и откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=ENDPOINTS,
+            help="Эндпоинт для прогона; можно указать несколько раз. "
+            "По умолчанию — все.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Username пользователя для авторизованных запросов. По умолчанию "
+            "выбирается пользователь с наибольшей корзиной.",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Создать синтетические данные на время прогона.",
+        )
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--ingredients", type=int, default=2000)
+        parser.add_argument("--random-seed", type=int, default=0)
+
+    @override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["random_seed"])
+        if not options["seed"]:
+            self._run(options)
+            return
+        try:
+            with transaction.atomic():
+                seed_data(
+                    users=options["users"],
+                    recipes=options["recipes"],
+                    ingredients=options["ingredients"],
+                    random_seed=options["random_seed"],
+                    prefix="benchmark",
+                )
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        user = self._get_user(options["user"])
+        client = APIClient()
+        client.force_authenticate(user)
+        self.recipe_ids = list(Recipe.objects.values_list("pk", flat=True)[:1000])
+        self.prefixes = sorted(
+            {name[:2] for name in Ingredient.objects.values_list("name", flat=True)[:1000]}
+        )
+        if not self.recipe_ids or not self.prefixes:
+            raise CommandError("В базе нет рецептов или ингредиентов; используйте --seed.")
+        self.stdout.write(
+            f"Пользователь: {user.username}, запросов на эндпоинт: {options['requests']}"
+        )
+        for endpoint in options["endpoint"] or ENDPOINTS:
+            self._benchmark(endpoint, client, options["requests"], options["warmup"])
+
+    def _get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"Пользователь {username} не найден.")
+        user = (
+            User.objects.annotate(cart_size=Count("cart_items"))
+            .order_by("-cart_size", "pk")
+            .first()
+        )
+        if user is None:
+            raise CommandError("В базе нет пользователей; используйте --seed.")
+        return user
+
+    def _url(self, endpoint):
+        if endpoint == "recipe_list":
+            return f"/api/recipes/?page={self.rng.randint(1, 20)}"
+        if endpoint == "recipe_detail":
+            return f"/api/recipes/{self.rng.choice(self.recipe_ids)}/"
+        if endpoint == "subscriptions":
+            return "/api/users/subscriptions/?recipes_limit=3"
+        if endpoint == "ingredient_search":
+            return f"/api/ingredients/?name={self.rng.choice(self.prefixes)}"
+        file_type = endpoint.rsplit("_", 1)[1]
+        return f"/api/recipes/download_shopping_cart/?file_type={file_type}"
+
+    def _request(self, client, url):
+        response = client.get(url)
+        if response.status_code >= 400:
+            raise CommandError(f"{url}: статус {response.status_code}")
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def _benchmark(self, endpoint, client, requests, warmup):
+        for _ in range(warmup):
+            self._request(client, self._url(endpoint))
+        latencies = []
+        queries = []
+        cache_hits = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            url = self._url(endpoint)
+            with CaptureQueriesContext(connection) as context:
+                request_started = time.perf_counter()
+                response = self._request(client, url)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            queries.append(len(context))
+            cache_hits += response.get("X-Cache") == "HIT"
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{endpoint:<18} p50 {percentile(latencies, 0.5):7.2f} мс  "
+                f"p95 {percentile(latencies, 0.95):7.2f} мс  "
+                f"запросов к БД {statistics.mean(queries):5.1f}  "
+                f"{requests / elapsed:7.1f} req/s  "
+                f"попаданий в кеш {cache_hits * 100 // requests}%"
+            )
+        )
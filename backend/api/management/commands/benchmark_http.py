@@ -0,0 +1,77 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_api import percentile
+
+DEFAULT_PATHS = ("/api/recipes/", "/api/ingredients/?name=а")
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает запущенный сервер параллельными клиентами и печатает "
+        "пропускную способность и задержки. Запускается по очереди против "
+        "WSGI (gunicorn) и ASGI (uvicorn) развёртываний для сравнения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Путь запроса; можно указать несколько раз. "
+            f"По умолчанию: {', '.join(DEFAULT_PATHS)}.",
+        )
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--token", help="Токен для заголовка Authorization: Token <token>."
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+        local = threading.local()
+
+        def fetch(path):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+                session.headers.update(headers)
+            started = time.perf_counter()
+            try:
+                response = session.get(
+                    options["url"] + path,
+                    timeout=options["timeout"],
+                    allow_redirects=False,
+                )
+                response.content
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            return (time.perf_counter() - started) * 1000, ok
+
+        for path in options["path"] or DEFAULT_PATHS:
+            with ThreadPoolExecutor(options["concurrency"]) as executor:
+                started = time.perf_counter()
+                results = list(executor.map(fetch, [path] * options["requests"]))
+                elapsed = time.perf_counter() - started
+            latencies = [latency for latency, ok in results if ok]
+            errors = len(results) - len(latencies)
+            if not latencies:
+                raise CommandError(f"{path}: все запросы завершились ошибкой.")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{path}: {len(results) / elapsed:.1f} req/s, "
+                    f"p50 {percentile(latencies, 0.5):.1f} мс, "
+                    f"p95 {percentile(latencies, 0.95):.1f} мс, "
+                    f"среднее {statistics.mean(latencies):.1f} мс, "
+                    f"ошибок {errors}"
+                )
+            )
@@ -0,0 +1,47 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.pdf import BOLD_FONT, FONT_NAMES, MEDIUM_FONT, PdfRenderer, get_font
+
+
+class Command(BaseCommand):
+    help = "Измеряет скорость генерации PDF списка покупок (страниц в секунду)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=200)
+        parser.add_argument("--text-length", type=int, default=1000)
+        parser.add_argument("--runs", type=int, default=3)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        for name in FONT_NAMES:
+            get_font(name)
+        self.stdout.write(
+            f"Загрузка шрифтов: {(time.perf_counter() - started) * 1000:.1f} мс"
+        )
+
+        text = ("Нарезать овощи и тушить на медленном огне " * 100)[
+            :options["text_length"]
+        ]
+        for run in range(1, options["runs"] + 1):
+            output = io.BytesIO()
+            started = time.perf_counter()
+            renderer = PdfRenderer(output)
+            for number in range(options["recipes"]):
+                renderer.text(f"Рецепт: Рагу №{number}", MEDIUM_FONT)
+                renderer.text(f"Текст: {text}")
+                for ingredient in range(10):
+                    renderer.text(f"- картофель {ingredient} - 200 г")
+                renderer.spacer(10)
+            renderer.text("Список ингредиентов для покупки:", BOLD_FONT)
+            renderer.save()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Прогон {run}: {renderer.page_count} стр. за {elapsed:.2f} с, "
+                    f"{renderer.page_count / elapsed:.1f} стр./с, "
+                    f"{len(output.getvalue()) / 1024:.0f} КБ"
+                )
+            )
@@ -0,0 +1,106 @@
+import base64
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient
+from users.models import User
+from .benchmark_api import Rollback
+
+DEFAULT_SIZES = (1, 5, 10, 30, 100)
+
+
+class Command(BaseCommand):
+    help = (
+        "Число SQL-запросов и время создания и изменения рецепта в зависимости "
+        "от числа ингредиентов. Данные создаются во временной транзакции "
+        "и откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            action="append",
+            help="Число ингредиентов в рецепте; можно указать несколько раз. "
+            f"По умолчанию: {', '.join(map(str, DEFAULT_SIZES))}.",
+        )
+
+    @override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    def handle(self, *args, **options):
+        sizes = sorted(options["size"] or DEFAULT_SIZES)
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 64), "orange").save(buffer, "PNG")
+        image = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+        try:
+            with transaction.atomic():
+                self._run(sizes, image)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, sizes, image):
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"benchmark-{index}", measurement_unit="г")
+            for index in range(sizes[-1] * 2)
+        )
+        ids = [ingredient.pk for ingredient in ingredients]
+        if None in ids:
+            ids = list(
+                Ingredient.objects.filter(name__startswith="benchmark-")
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+        user = User.objects.create_user(
+            username="benchmark-writer",
+            email="benchmark-writer@example.com",
+            first_name="benchmark",
+            last_name="benchmark",
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        for size in sizes:
+            response, create = self._request(
+                client.post,
+                "/api/recipes/",
+                {
+                    "name": f"benchmark {size}",
+                    "text": "benchmark",
+                    "cooking_time": 10,
+                    "image": image,
+                    "ingredients": [{"id": pk, "amount": 1} for pk in ids[:size]],
+                },
+            )
+            # Половина ингредиентов заменяется, у остальных меняется количество.
+            _, update = self._request(
+                client.patch,
+                f"/api/recipes/{response.data['id']}/",
+                {
+                    "ingredients": [
+                        {"id": pk, "amount": 2}
+                        for pk in ids[size // 2:size // 2 + size]
+                    ]
+                },
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"ингредиентов {size:>4}: создание {create[0]:>3} запросов "
+                    f"{create[1]:7.1f} мс, изменение {update[0]:>3} запросов "
+                    f"{update[1]:7.1f} мс"
+                )
+            )
+
+    def _request(self, method, url, data):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = method(url, data, format="json")
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise CommandError(f"{url}: статус {response.status_code}: {response.data}")
+        return response, (len(context), elapsed)
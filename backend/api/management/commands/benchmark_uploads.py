@@ -0,0 +1,92 @@
+import base64
+import io
+import json
+import os
+import time
+import tracemalloc
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.constants import AVATAR_MAX_SIZE, AVATAR_VARIANTS
+from api.images import ProcessedImageField
+
+URL = "/api/users/me/avatar/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Пиковое потребление памяти интерпретатором (tracemalloc) при разборе "
+        "и декодировании одной загрузки картинки: base64 в JSON старым "
+        "и новым способом и multipart/form-data. Буферы пикселей Pillow "
+        "выделяются вне интерпретатора и в замер не входят."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--width", type=int, default=3000)
+        parser.add_argument("--height", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        size = (options["width"], options["height"])
+        # Шум плохо сжимается, поэтому файл получается размером с фотографию.
+        image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=90)
+        raw = buffer.getvalue()
+        data_uri = "data:image/jpeg;base64," + base64.b64encode(raw).decode()
+        json_body = json.dumps({"avatar": data_uri})
+        multipart_body = encode_multipart(
+            BOUNDARY, {"avatar": SimpleUploadedFile("avatar.jpg", raw)}
+        )
+        del image, buffer, data_uri
+        self.stdout.write(f"Картинка {size[0]}x{size[1]}, {len(raw) / 2**20:.1f} МБ")
+
+        factory = APIRequestFactory()
+        field = ProcessedImageField(max_size=AVATAR_MAX_SIZE, variants=AVATAR_VARIANTS)
+        cases = (
+            (
+                "JSON, base64, drf-extra-fields",
+                lambda: Request(
+                    factory.put(URL, json_body, content_type="application/json"),
+                    parsers=[JSONParser()],
+                ),
+                Base64ImageField().to_internal_value,
+            ),
+            (
+                "JSON, base64, потоковое декодирование",
+                lambda: Request(
+                    factory.put(URL, json_body, content_type="application/json"),
+                    parsers=[JSONParser()],
+                ),
+                field.to_internal_value,
+            ),
+            (
+                "multipart/form-data",
+                lambda: Request(
+                    factory.put(URL, multipart_body, content_type=MULTIPART_CONTENT),
+                    parsers=[MultiPartParser()],
+                ),
+                field.to_internal_value,
+            ),
+        )
+        for name, make_request, decode in cases:
+            tracemalloc.start()
+            request = make_request()
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            decode(request.data["avatar"])
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            tracemalloc.stop()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name:<40} пик {peak / 2**20:6.1f} МБ, {elapsed * 1000:6.0f} мс"
+                )
+            )
@@ -0,0 +1,129 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.exports import cart_ingredients
+from api.pagination import StandardResultsPagination
+from recipes.models import Ingredient, Recipe
+from recipes.seeding import seed_data
+from users.models import User
+
+LARGE_TABLES = (
+    "recipes_recipe",
+    "recipes_recipeingredient",
+    "recipes_favorite",
+    "recipes_shoppingcart",
+    "recipes_ingredient",
+    "users_user",
+    "users_subscription",
+)
+SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими данными внутри транзакции, выполняет "
+        "EXPLAIN для нагруженных запросов API и завершается с ошибкой, если "
+        "в плане есть последовательное сканирование больших таблиц. "
+        "Все изменения откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--recipes", type=int, default=20000)
+        parser.add_argument("--ingredients", type=int, default=5000)
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Печатать планы всех запросов, а не только проблемных.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Проверка планов поддерживается только в PostgreSQL.")
+        failures = []
+        try:
+            with transaction.atomic():
+                seed_data(
+                    users=options["users"],
+                    recipes=options["recipes"],
+                    ingredients=options["ingredients"],
+                    prefix="plancheck",
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                for name, queryset in self._hot_queries():
+                    plan = queryset.explain()
+                    scanned = set(SEQ_SCAN.findall(plan)) & set(LARGE_TABLES)
+                    if scanned:
+                        failures.append(name)
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f"FAIL {name}: Seq Scan on {', '.join(sorted(scanned))}"
+                            )
+                        )
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f"OK   {name}"))
+                    if scanned or options["verbose_plans"]:
+                        self.stdout.write(plan)
+                raise Rollback
+        except Rollback:
+            pass
+        if failures:
+            raise CommandError(
+                f"Последовательное сканирование в запросах: {', '.join(failures)}"
+            )
+
+    def _hot_queries(self):
+        user = (
+            User.objects.filter(username__startswith="plancheck_")
+            .order_by("-subscribers_count")
+            .first()
+        )
+        recipe = Recipe.objects.filter(author=user).first()
+        latest = Recipe.objects.order_by("-created_at", "-id").first()
+        feed = Recipe.objects.with_user_flags(user)
+        # Тот же фильтр и порядок, что у ?cursor= в списке рецептов.
+        paginator = StandardResultsPagination()
+        return (
+            ("recipe list", feed[:10]),
+            ("recipe list by author", feed.filter(author=user)[:10]),
+            (
+                "recipe list in shopping cart",
+                feed.filter(added_to_carts__user=user)[:10],
+            ),
+            (
+                "recipe list favorited",
+                feed.filter(marked_as_favorite__user=user)[:10],
+            ),
+            (
+                "recipe list by cursor",
+                paginator.cursor_queryset(
+                    feed, "created_at", latest.created_at, latest.pk
+                )[:paginator.page_size + 1],
+            ),
+            ("recipe detail", feed.filter(pk=recipe.pk)),
+            (
+                "ingredient name prefix",
+                Ingredient.objects.filter(name__startswith="plancheck ингредиент 12"),
+            ),
+            (
+                "subscriptions",
+                User.objects.filter(subscribers__user=user)[:10],
+            ),
+            (
+                "subscribers of author",
+                User.objects.filter(subscriptions__author=user)[:10],
+            ),
+            (
+                "subscription recipes preview",
+                Recipe.objects.filter(author__subscribers__user=user)
+                .limited_per_author(3),
+            ),
+            ("shopping list totals", cart_ingredients(user)),
+        )
@@ -0,0 +1,93 @@
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверка избранного, корзины и подписок на гонки: параллельные "
+        "POST и DELETE для одной пары пользователь—объект должны дать ровно "
+        "один 201 и один 204, остальные — 400, а счётчики должны совпасть "
+        "с числом строк. Тестовые данные создаются в базе и удаляются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    @override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        user, author = (
+            User.objects.create_user(
+                username=f"race-{role}-{suffix}",
+                email=f"race-{role}-{suffix}@example.com",
+                first_name=role,
+                last_name=role,
+            )
+            for role in ("user", "author")
+        )
+        try:
+            recipe = Recipe.objects.create(
+                author=author, name=f"race-{suffix}", text="race", cooking_time=1
+            )
+            cases = (
+                (f"/api/recipes/{recipe.pk}/favorite/", Favorite, Recipe,
+                 recipe.pk, "favorites_count"),
+                (f"/api/recipes/{recipe.pk}/shopping_cart/", ShoppingCart, Recipe,
+                 recipe.pk, "in_carts_count"),
+                (f"/api/users/{author.pk}/subscribe/", Subscription, User,
+                 author.pk, "subscribers_count"),
+            )
+            failed = False
+            for url, model, counter_model, target_id, counter in cases:
+                for _ in range(options["rounds"]):
+                    for method, success in (("post", 201), ("delete", 204)):
+                        statuses = self._fire(user, method, url, options["concurrency"])
+                        rows = model.objects.filter(user=user).count()
+                        value = counter_model.objects.values_list(
+                            counter, flat=True
+                        ).get(pk=target_id)
+                        expected = int(method == "post")
+                        ok = (
+                            statuses[success] == 1
+                            and statuses[400] == options["concurrency"] - 1
+                            and rows == value == expected
+                        )
+                        failed |= not ok
+                        self.stdout.write(
+                            (self.style.SUCCESS if ok else self.style.ERROR)(
+                                f"{method.upper():<6} {url}: {dict(statuses)}, "
+                                f"строк {rows}, {counter} {value}"
+                            )
+                        )
+        finally:
+            user.delete()
+            author.delete()
+        if failed:
+            raise CommandError("Обнаружены гонки или расхождение счётчиков.")
+
+    def _fire(self, user, method, url, concurrency):
+        barrier = threading.Barrier(concurrency)
+
+        def request(_):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                return getattr(client, method)(url).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return Counter(executor.map(request, range(concurrency)))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from api.constants import (
+    AVATAR_MAX_SIZE,
+    AVATAR_VARIANTS,
+    RECIPE_IMAGE_MAX_SIZE,
+    RECIPE_IMAGE_VARIANTS,
+)
+from api.images import ensure_variants
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт недостающие WebP-варианты картинок рецептов и аватаров: "
+        "загруженных до появления обработки изображений, через админку "
+        "или массовым импортом."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересоздать варианты, даже если они уже есть.",
+        )
+
+    def handle(self, *args, **options):
+        targets = (
+            (
+                Recipe.objects.exclude(image=""),
+                "image",
+                RECIPE_IMAGE_MAX_SIZE,
+                RECIPE_IMAGE_VARIANTS,
+            ),
+            (
+                User.objects.exclude(avatar="").exclude(avatar=None),
+                "avatar",
+                AVATAR_MAX_SIZE,
+                AVATAR_VARIANTS,
+            ),
+        )
+        for queryset, field, max_size, variants in targets:
+            created = failed = 0
+            for instance in queryset.only("pk", field).iterator():
+                field_file = getattr(instance, field)
+                try:
+                    processed = ensure_variants(
+                        field_file, max_size, variants, overwrite=options["force"]
+                    )
+                except Exception as error:
+                    failed += 1
+                    self.stdout.write(
+                        self.style.WARNING(f"{field_file.name}: {error}")
+                    )
+                    continue
+                created += processed
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{queryset.model.__name__}.{field}: обработано {created}, "
+                    f"ошибок {failed}"
+                )
+            )
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.constants import EXPORT_JOB_TTL_HOURS, EXPORT_WORKER_POLL_INTERVAL
+from api.exports import (
+    claim_export_job,
+    fail_stale_export_jobs,
+    process_export_job,
+)
+from recipes.models import ShoppingCartExport
+
+
+class Command(BaseCommand):
+    help = "Обрабатывает очередь фоновых выгрузок списков покупок."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать все задания в очереди и завершиться.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=EXPORT_WORKER_POLL_INTERVAL,
+            help="Пауза между опросами пустой очереди, в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("Обработчик выгрузок запущен."))
+        while True:
+            self._delete_expired()
+            fail_stale_export_jobs()
+            job = claim_export_job()
+            if job is not None:
+                job = process_export_job(job)
+                message = f"Выгрузка {job.pk}: {job.get_status_display()}"
+                if job.status == ShoppingCartExport.FAILED:
+                    self.stdout.write(self.style.ERROR(message))
+                else:
+                    self.stdout.write(self.style.SUCCESS(message))
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
+
+    def _delete_expired(self):
+        expired = ShoppingCartExport.objects.filter(
+            finished_at__lt=timezone.now() - timedelta(hours=EXPORT_JOB_TTL_HOURS)
+        )
+        for job in expired:
+            job.file.delete(save=False)
+            job.delete()
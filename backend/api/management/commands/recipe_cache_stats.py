@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import get_stats
+
+
+class Command(BaseCommand):
+    help = "Показывает статистику попаданий в кеш ленты рецептов."
+
+    def handle(self, *args, **kwargs):
+        stats = get_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Попаданий: {stats['hits']}, промахов: {stats['misses']}, "
+                f"доля попаданий: {stats['hit_ratio']:.1%}"
+            )
+        )
@@ -0,0 +1,96 @@
+import bisect
+import threading
+
+from .constants import METRICS_LATENCY_BUCKETS, METRICS_QUERY_BUCKETS
+
+
+class Histogram:
+    """Накопительная гистограмма в формате Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+METRICS = (
+    (
+        "foodgram_request_duration_seconds",
+        "Время обработки запроса.",
+        METRICS_LATENCY_BUCKETS,
+    ),
+    (
+        "foodgram_request_queries",
+        "Количество SQL-запросов на запрос.",
+        METRICS_QUERY_BUCKETS,
+    ),
+    (
+        "foodgram_request_db_duration_seconds",
+        "Суммарное время SQL-запросов на запрос.",
+        METRICS_LATENCY_BUCKETS,
+    ),
+)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """
+    Процессный агрегатор метрик запросов по эндпоинтам
+    (например, RecipeViewSet.list) и HTTP-методам.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, endpoint, method, duration, queries, db_duration):
+        with self._lock:
+            histograms = self._histograms.get((endpoint, method))
+            if histograms is None:
+                histograms = self._histograms[(endpoint, method)] = [
+                    Histogram(buckets) for _, _, buckets in METRICS
+                ]
+            for histogram, value in zip(
+                histograms, (duration, queries, db_duration)
+            ):
+                histogram.observe(value)
+
+    def render(self):
+        """Возвращает метрики в текстовом формате Prometheus."""
+        lines = []
+        with self._lock:
+            series = sorted(self._histograms.items())
+            for index, (name, description, _) in enumerate(METRICS):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (endpoint, method), histograms in series:
+                    labels = (
+                        f'endpoint="{_escape(endpoint)}",method="{_escape(method)}"'
+                    )
+                    lines.extend(histograms[index].render(name, labels))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+request_metrics = RequestMetrics()
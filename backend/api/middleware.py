@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .metrics import request_metrics
+
+logger = logging.getLogger(__name__)
+
+current_collector = ContextVar("current_collector", default=None)
+
+
+def endpoint_name(view_func, method):
+    """
+    Имя эндпоинта для метрик: для DRF — класс представления и действие
+    (RecipeViewSet.list, UserViewSet.subscriptions), иначе — путь к функции.
+    """
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f"{view_class.__name__}.{action}"
+
+
+def collect_queries(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL, которую получает каждое соединение
+    (см. api.signals.install_query_metrics).
+    Передаёт запрос сборщику текущего HTTP-запроса; контекстная переменная
+    доступна и в потоках, где асинхронные представления обращаются к базе.
+    """
+    collector = current_collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    return collector(execute, sql, params, many, context)
+
+
+class QueryCollector:
+    """Считает SQL-запросы одного HTTP-запроса и их суммарное время."""
+
+    def __init__(self, keep_sql):
+        self.count = 0
+        self.duration = 0
+        self.statements = [] if keep_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+            if self.statements is not None:
+                self.statements.append(sql)
+
+
+class QueryMetricsMiddleware:
+    """
+    Собирает для каждого эндпоинта время ответа, количество SQL-запросов
+    и время работы с базой. Запросы, выполнившие больше
+    SLOW_REQUEST_QUERY_THRESHOLD SQL-запросов, логируются вместе с SQL.
+    Запросы, выполняемые при отдаче потоковых ответов, не учитываются.
+    Работает и в синхронном, и в асинхронном режиме.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = settings.SLOW_REQUEST_QUERY_THRESHOLD
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django распознаёт асинхронный экземпляр middleware,
+            # см. django.utils.deprecation.MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self._acall(request)
+        collector = QueryCollector(keep_sql=bool(self.threshold))
+        token = current_collector.set(collector)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        self._record(request, collector, time.perf_counter() - started)
+        return response
+
+    async def _acall(self, request):
+        collector = QueryCollector(keep_sql=bool(self.threshold))
+        token = current_collector.set(collector)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        self._record(request, collector, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, collector, duration):
+        match = request.resolver_match
+        endpoint = (
+            endpoint_name(match.func, request.method) if match else "unmatched"
+        )
+        request_metrics.observe(
+            endpoint, request.method, duration, collector.count, collector.duration
+        )
+        if self.threshold and collector.count > self.threshold:
+            logger.warning(
+                "%s %s (%s): %d SQL-запросов за %.3f с\n%s",
+                request.method,
+                request.path,
+                endpoint,
+                collector.count,
+                collector.duration,
+                "\n".join(collector.statements),
+            )
@@ -1,12 +1,122 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+from collections import OrderedDict
+
 from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class StandardResultsPagination(PageNumberPagination):
     """
     Переопределённый пагинатор, который добавляет общее количество страниц,
     ссылку на следующую и предыдущую страницы и возвращает результаты.
+
+    Дополнительно поддерживает:
+    - ?cursor= — постраничный вывод по ключу (cursor_field, id) без OFFSET
+      и COUNT(*); поле ключа задаётся атрибутом cursor_field представления;
+    - ?count=0 — обычные страницы без подсчёта общего количества.
+
+    Для списков, не являющихся QuerySet, ?cursor= игнорируется.
     """
     page_size = settings.REST_FRAMEWORK_PAGE_SIZE
     page_size_query_param = 'limit'
     max_page_size = settings.REST_FRAMEWORK_MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_cursor_field = 'created_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.mode = 'page'
+        # Курсор строится по полю модели, поэтому списки, уже упорядоченные
+        # по другому признаку, выводятся обычными страницами.
+        is_queryset = isinstance(queryset, QuerySet)
+        if is_queryset and self.cursor_query_param in request.query_params:
+            self.mode = 'cursor'
+            return self._paginate_by_cursor(queryset, request, view)
+        if request.query_params.get(self.count_query_param) == '0':
+            self.mode = 'no_count'
+            return self._paginate_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.mode == 'page':
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.next_link),
+            ('previous', self.previous_link),
+            ('results', data),
+        ]))
+
+    def _paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        page_param = request.query_params.get(self.page_query_param, '1')
+        page_number = int(page_param) if page_param.isdigit() else 1
+        page_number = max(page_number, 1)
+        offset = (page_number - 1) * page_size
+        items = list(queryset[offset:offset + page_size + 1])
+        url = request.build_absolute_uri()
+        self.next_link = (
+            replace_query_param(url, self.page_query_param, page_number + 1)
+            if len(items) > page_size else None
+        )
+        if page_number == 1:
+            self.previous_link = None
+        elif page_number == 2:
+            self.previous_link = remove_query_param(url, self.page_query_param)
+        else:
+            self.previous_link = replace_query_param(
+                url, self.page_query_param, page_number - 1
+            )
+        return items[:page_size]
+
+    def _paginate_by_cursor(self, queryset, request, view):
+        field = getattr(view, 'cursor_field', self.default_cursor_field)
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        queryset = self.cursor_queryset(
+            queryset, field, *(self._decode_cursor(cursor) if cursor else ())
+        )
+        items = list(queryset[:page_size + 1])
+        self.previous_link = None
+        self.next_link = None
+        if len(items) > page_size:
+            last = items[page_size - 1]
+            self.next_link = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                self._encode_cursor(getattr(last, field), last.pk),
+            )
+        return items[:page_size]
+
+    def cursor_queryset(self, queryset, field, value=None, pk=None):
+        """
+        Упорядочивает queryset по ключу (field, pk) по убыванию и, если
+        передан ключ последней строки страницы, оставляет строки после него.
+        """
+        queryset = queryset.order_by(f'-{field}', '-pk')
+        if value is not None:
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+            )
+        return queryset
+
+    def _encode_cursor(self, value, pk):
+        raw = f'{value.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def _decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            value, pk = raw.rsplit('|', 1)
+            value = parse_datetime(value)
+            if value is None:
+                raise ValueError
+            return value, int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound('Неверный курсор.')
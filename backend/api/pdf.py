@@ -0,0 +1,111 @@
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+REGULAR_FONT = "NTSomic-Regular"
+MEDIUM_FONT = "NTSomic-Medium"
+BOLD_FONT = "NTSomic-Bold"
+FONT_NAMES = (REGULAR_FONT, MEDIUM_FONT, BOLD_FONT)
+
+_fonts = {}
+_fonts_lock = threading.Lock()
+
+
+class FontMetrics:
+    """Зарегистрированный шрифт с таблицей ширин глифов для переноса строк."""
+
+    def __init__(self, name, font):
+        self.name = name
+        self._widths = dict(font.face.charWidths)
+        self._default_width = font.face.defaultWidth
+
+    def string_width(self, text, size):
+        """Ширина строки в пунктах при заданном кегле."""
+        widths = self._widths
+        default = self._default_width
+        return sum(widths.get(ord(char), default) for char in text) * size / 1000
+
+
+def get_font(name):
+    """
+    Возвращает метрики шрифта, при первом обращении загружая TTF-файл
+    из каталога fonts проекта и регистрируя его в reportlab.
+    """
+    metrics = _fonts.get(name)
+    if metrics is not None:
+        return metrics
+    with _fonts_lock:
+        if name not in _fonts:
+            path = Path(settings.BASE_DIR) / "fonts" / f"{name}.ttf"
+            font = TTFont(name, str(path))
+            pdfmetrics.registerFont(font)
+            _fonts[name] = FontMetrics(name, font)
+    return _fonts[name]
+
+
+def wrap_text(text, metrics, size, max_width):
+    """Разбивает текст на строки не шире max_width, перенося по словам."""
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if metrics.string_width(candidate, size) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            line = ""
+            for char in word:
+                if metrics.string_width(line + char, size) > max_width and line:
+                    lines.append(line)
+                    line = ""
+                line += char
+        lines.append(line)
+    return lines
+
+
+class PdfRenderer:
+    """Вывод текста в PDF с переносом строк и разбиением на страницы."""
+
+    def __init__(self, output, pagesize=letter, margin=50):
+        self.pdf = canvas.Canvas(output, pagesize=pagesize)
+        self.width, self.height = pagesize
+        self.margin = margin
+        self.y = self.height - margin
+        self.page_count = 1
+        self._font = None
+
+    def _set_font(self, metrics, size):
+        if self._font != (metrics.name, size):
+            self.pdf.setFont(metrics.name, size)
+            self._font = (metrics.name, size)
+
+    def new_page(self):
+        self.pdf.showPage()
+        self.page_count += 1
+        self.y = self.height - self.margin
+        self._font = None
+
+    def text(self, text, font=REGULAR_FONT, size=12, indent=0):
+        """Выводит абзац, перенося его на новые строки и страницы."""
+        metrics = get_font(font)
+        leading = size * 1.3
+        max_width = self.width - 2 * self.margin - indent
+        for line in wrap_text(text, metrics, size, max_width):
+            if self.y - leading < self.margin:
+                self.new_page()
+            self.y -= leading
+            self._set_font(metrics, size)
+            self.pdf.drawString(self.margin + indent, self.y, line)
+
+    def spacer(self, height):
+        self.y -= height
+
+    def save(self):
+        self.pdf.save()
@@ -0,0 +1,137 @@
+import threading
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from recipes.cache import increment_counter
+from recipes.models import RecipeIngredient
+from .constants import (
+    RECIPE_MATCH_CHANGE_LOG_SIZE,
+    RECIPE_MATCH_CHANGE_LOG_TTL,
+)
+
+VERSION_KEY = "recipe_ingredients:version"
+
+
+class RecipeMatcher:
+    """
+    Обратный индекс «ингредиент → рецепты» для подбора рецептов
+    по имеющимся продуктам.
+
+    Индекс хранится в памяти процесса. Каждое изменение рецепта получает
+    номер версии в общем кеше, а идентификатор рецепта записывается
+    в журнал под этим номером, поэтому все процессы перечитывают только
+    изменённые рецепты. Полная перестройка нужна при первом подборе,
+    после массовых изменений и если журнал отстал или потерял запись.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._postings = defaultdict(set)
+        self._recipe_ingredients = {}
+        self._dirty = set()
+
+    def _build(self):
+        postings = defaultdict(set)
+        recipe_ingredients = defaultdict(set)
+        rows = RecipeIngredient.objects.order_by().values_list(
+            "recipe_id", "ingredient_id"
+        )
+        for recipe_id, ingredient_id in rows.iterator(chunk_size=10000):
+            postings[ingredient_id].add(recipe_id)
+            recipe_ingredients[recipe_id].add(ingredient_id)
+        self._postings = postings
+        self._recipe_ingredients = dict(recipe_ingredients)
+
+    def _ensure_fresh(self):
+        version = cache.get(VERSION_KEY, 0)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            changed = self._read_log(self._version, version)
+            if changed is None:
+                self._dirty = set()
+                self._build()
+            else:
+                self._dirty |= changed
+            self._version = version
+
+    def _read_log(self, start, end):
+        """Рецепты, изменённые после версии start, или None без журнала."""
+        # Версия уменьшается, если общий кеш был очищен.
+        if start is None or not start < end <= start + RECIPE_MATCH_CHANGE_LOG_SIZE:
+            return None
+        keys = [f"{VERSION_KEY}:{number}" for number in range(start + 1, end + 1)]
+        entries = cache.get_many(keys)
+        if len(entries) != len(keys):
+            return None
+        return set(entries.values())
+
+    def invalidate(self):
+        """Помечает индекс устаревшим во всех процессах."""
+        # Для этой версии журнала нет, поэтому индекс перестраивается.
+        increment_counter(VERSION_KEY)
+        self._version = None
+
+    def mark_dirty(self, recipe_id):
+        """
+        Помечает рецепт изменённым во всех процессах. Его состав
+        перечитывается одним запросом для всех помеченных рецептов
+        при следующем подборе.
+        """
+        version = increment_counter(VERSION_KEY)
+        cache.set(
+            f"{VERSION_KEY}:{version}", recipe_id, RECIPE_MATCH_CHANGE_LOG_TTL
+        )
+
+    def _reindex_dirty(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        ingredients = defaultdict(set)
+        rows = RecipeIngredient.objects.filter(recipe_id__in=dirty).values_list(
+            "recipe_id", "ingredient_id"
+        )
+        for recipe_id, ingredient_id in rows:
+            ingredients[recipe_id].add(ingredient_id)
+        with self._lock:
+            for recipe_id in dirty:
+                self._replace(recipe_id, ingredients.get(recipe_id, set()))
+
+    def _replace(self, recipe_id, ingredient_ids):
+        previous = self._recipe_ingredients.pop(recipe_id, set())
+        for ingredient_id in previous - ingredient_ids:
+            self._postings[ingredient_id].discard(recipe_id)
+        for ingredient_id in ingredient_ids - previous:
+            self._postings[ingredient_id].add(recipe_id)
+        if ingredient_ids:
+            self._recipe_ingredients[recipe_id] = ingredient_ids
+
+    def match(self, ingredient_ids, min_coverage=0.0):
+        """
+        Возвращает список (recipe_id, coverage, matched), отсортированный
+        по доле имеющихся ингредиентов, затем по числу совпадений
+        и новизне рецепта.
+        """
+        self._ensure_fresh()
+        self._reindex_dirty()
+        matched = Counter()
+        results = []
+        # _replace меняет множества индекса на месте.
+        with self._lock:
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self._postings.get(ingredient_id, ()))
+            for recipe_id, count in matched.items():
+                total = len(self._recipe_ingredients.get(recipe_id, ())) or count
+                coverage = count / total
+                if coverage >= min_coverage:
+                    results.append((recipe_id, coverage, count))
+        results.sort(key=lambda item: (-item[1], -item[2], -item[0]))
+        return results
+
+
+recipe_matcher = RecipeMatcher()
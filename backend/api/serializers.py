@@ -1,14 +1,55 @@
+import json
 import re
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from rest_framework import serializers
-from drf_extra_fields.fields import Base64ImageField
 
-from recipes.models import Recipe, Ingredient, RecipeIngredient
+from recipes.counters import adjust_counter
+from recipes.models import (
+    Recipe,
+    Ingredient,
+    RecipeIngredient,
+    ShoppingCartExport,
+)
 from users.models import User
-from .constants import MIN_AMOUNT_OF_INGREDIENTS
+from .constants import (
+    AVATAR_MAX_SIZE,
+    AVATAR_VARIANTS,
+    MIN_AMOUNT_OF_INGREDIENTS,
+    RECIPE_IMAGE_MAX_SIZE,
+    RECIPE_IMAGE_VARIANTS,
+)
+from .images import ProcessedImageField, save_variants, variant_url
+
+
+def parse_multipart(data, json_fields):
+    """
+    Превращает данные multipart/form-data в обычный словарь: вложенные
+    структуры в такой форме передаются JSON-строкой.
+    """
+    if not hasattr(data, "getlist"):
+        return data
+    result = data.dict()
+    for field in json_fields:
+        value = result.get(field)
+        if isinstance(value, str):
+            try:
+                result[field] = json.loads(value)
+            except ValueError:
+                pass
+    return result
+
+
+def get_recipes_limit(request):
+    """Значение параметра recipes_limit или None, если он не задан."""
+    recipes_limit = request.query_params.get("recipes_limit")
+    if recipes_limit and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -29,8 +70,35 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "measurement_unit", "amount"]
 
 
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """
+    Список ингредиентов рецепта: повторы и несуществующие идентификаторы
+    проверяются для всего списка сразу, одним запросом к базе.
+    """
+
+    default_error_messages = {
+        "empty": "Нужно указать хотя бы один ингредиент.",
+        "duplicates": "Ингредиенты не должны повторяться.",
+        "missing": "Ингредиенты не найдены: {ids}.",
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and not data:
+            self.fail("empty")
+        items = super().to_internal_value(data)
+        ids = [item["id"] for item in items]
+        if len(ids) != len(set(ids)):
+            self.fail("duplicates")
+        missing = set(ids).difference(
+            Ingredient.objects.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        if missing:
+            self.fail("missing", ids=", ".join(map(str, sorted(missing))))
+        return items
+
+
 class RecipeCreateIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(
         min_value=MIN_AMOUNT_OF_INGREDIENTS,
         error_messages={
@@ -41,10 +109,15 @@ class RecipeCreateIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ["id", "amount"]
+        list_serializer_class = RecipeIngredientListSerializer
 
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(required=True)
+    image = ProcessedImageField(
+        required=True,
+        max_size=RECIPE_IMAGE_MAX_SIZE,
+        variants=RECIPE_IMAGE_VARIANTS,
+    )
     author = serializers.HiddenField(default=serializers.CurrentUserDefault())
     ingredients = RecipeCreateIngredientSerializer(many=True, write_only=True)
 
@@ -60,57 +133,84 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             "cooking_time",
         ]
 
+    def __init__(self, *args, **kwargs):
+        if "data" in kwargs:
+            kwargs["data"] = parse_multipart(kwargs["data"], ["ingredients"])
+        super().__init__(*args, **kwargs)
+
     def validate_image(self, value):
         if not value:
             raise serializers.ValidationError("Поле 'image' не может быть пустым.")
         return value
 
     def validate(self, data):
-        ingredients = self.initial_data.get("ingredients")
-
-        if ingredients is None:
+        # При частичном обновлении список ингредиентов тоже обязателен.
+        if "ingredients" not in data:
             raise serializers.ValidationError(
                 {"ingredients": "Поле 'ingredients' обязательно."}
             )
-
-        if not ingredients:
-            raise serializers.ValidationError(
-                {"ingredients": "Нужно указать хотя бы один ингредиент."}
-            )
-
-        ingredient_ids = [int(item.get("id")) for item in ingredients]
-        if len(ingredient_ids) != len(set(ingredient_ids)):
-            raise serializers.ValidationError(
-                {"ingredients": "Ингредиенты не должны повторяться."}
-            )
-
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         recipe = Recipe.objects.create(**validated_data)
+        save_variants(recipe.image, validated_data["image"])
         self._create_ingredients(recipe, ingredients_data)
+        adjust_counter(User, recipe.author_id, "recipes_count", 1)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop("ingredients", None)
         instance = super().update(instance, validated_data)
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        self._create_ingredients(instance, ingredients_data)
-        return super().update(instance, validated_data)
+        if "image" in validated_data:
+            save_variants(instance.image, validated_data["image"])
+        if ingredients_data is not None:
+            self._update_ingredients(instance, ingredients_data)
+        return instance
+
+    def _update_ingredients(self, recipe, ingredients_data):
+        """Изменяет только добавленные, удалённые и изменённые ингредиенты."""
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        amounts = {item["id"]: item["amount"] for item in ingredients_data}
+        removed = [
+            recipe_ingredient.pk
+            for ingredient_id, recipe_ingredient in current.items()
+            if ingredient_id not in amounts
+        ]
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        changed = []
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ["amount"])
+        self._create_ingredients(
+            recipe,
+            [item for item in ingredients_data if item["id"] not in current],
+        )
 
     def _create_ingredients(self, recipe, ingredients_data):
         recipe_ingredients = [
             RecipeIngredient(
                 recipe=recipe,
-                ingredient=ingredient_data["id"],
+                ingredient_id=ingredient_data["id"],
                 amount=ingredient_data["amount"],
             )
             for ingredient_data in ingredients_data
         ]
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        if recipe_ingredients:
+            RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
     def to_representation(self, instance):
+        prefetch_related_objects([instance], "recipe_ingredients__ingredient")
         return RecipeReadSerializer(
             instance,
             context=self.context
@@ -136,17 +236,19 @@ class UserSerializer(DjoserUserSerializer):
         )
 
     def get_is_subscribed(self, author):
+        if hasattr(author, "is_subscribed"):
+            return author.is_subscribed
         current_user = self.context["request"].user
         if not current_user.is_authenticated:
             return False
         return author.subscribers.filter(user=current_user).exists()
 
     def get_avatar(self, author):
-        return author.avatar.url if author.avatar else ""
+        return variant_url(author.avatar, "thumb")
 
 
 class RecipeReadSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = ProcessedImageField()
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientSerializer(many=True, source="recipe_ingredients")
     is_favorited = serializers.SerializerMethodField()
@@ -166,13 +268,22 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
         ]
 
+    def to_representation(self, recipe):
+        if hasattr(recipe, "is_author_subscribed"):
+            recipe.author.is_subscribed = recipe.is_author_subscribed
+        return super().to_representation(recipe)
+
     def get_is_favorited(self, recipe):
+        if hasattr(recipe, "is_favorited"):
+            return recipe.is_favorited
         current_user = self.context.get("request").user
         if current_user.is_anonymous:
             return False
         return recipe.marked_as_favorite.filter(user=current_user).exists()
 
     def get_is_in_shopping_cart(self, recipe):
+        if hasattr(recipe, "is_in_shopping_cart"):
+            return recipe.is_in_shopping_cart
         current_user = self.context.get("request").user
         if current_user.is_anonymous:
             return False
@@ -180,11 +291,21 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image = ProcessedImageField(read_only=True, variant="thumb")
+
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
 
 
+class ShoppingCartExportSerializer(serializers.ModelSerializer):
+    """Сериализатор статуса фоновой выгрузки списка покупок."""
+
+    class Meta:
+        model = ShoppingCartExport
+        fields = ("id", "status", "file_type", "error", "created_at", "finished_at")
+
+
 class UserCreateSerializer(BaseUserCreateSerializer):
     """Сериализатор регистрации пользователя с валидацией username."""
 
@@ -211,7 +332,9 @@ class UserCreateSerializer(BaseUserCreateSerializer):
 class AvatarSerializer(serializers.Serializer):
     """Сериализатор для обработки изображения в формате Base64."""
 
-    avatar = Base64ImageField(required=True)
+    avatar = ProcessedImageField(
+        required=True, max_size=AVATAR_MAX_SIZE, variants=AVATAR_VARIANTS
+    )
 
     def validate_avatar(self, value):
         """Декодируем base64 и создаём файл-объект."""
@@ -222,7 +345,7 @@ class AvatarSerializer(serializers.Serializer):
 
 class SubscriptionSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(source="recipes.count", read_only=True)
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + (
@@ -232,11 +355,13 @@ class SubscriptionSerializer(UserSerializer):
         )
 
     def get_recipes(self, author):
-        request = self.context.get("request")
-        recipes_limit = request.query_params.get("recipes_limit")
-        author_recipes = author.recipes.all()
-        if recipes_limit and recipes_limit.isdigit():
-            author_recipes = author_recipes[:int(recipes_limit)]
+        if hasattr(author, "recipes_preview"):
+            author_recipes = author.recipes_preview
+        else:
+            author_recipes = author.recipes.all()
+            recipes_limit = get_recipes_limit(self.context.get("request"))
+            if recipes_limit is not None:
+                author_recipes = author_recipes[:recipes_limit]
         return ShortRecipeSerializer(
             author_recipes, many=True, context=self.context
         ).data
@@ -0,0 +1,158 @@
+import logging
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from recipes.signals import (
+    ingredients_imported,
+    recipes_bulk_created,
+    relation_changed,
+)
+from users.models import Subscription, User
+from .cache import invalidate_all, invalidate_user
+from .constants import (
+    AUTHOR_FEED_FIELDS,
+    AVATAR_MAX_SIZE,
+    AVATAR_VARIANTS,
+    RECIPE_IMAGE_MAX_SIZE,
+    RECIPE_IMAGE_VARIANTS,
+)
+from .images import ensure_variants
+from .ingredient_index import ingredient_index
+from .middleware import collect_queries
+from .recipe_matcher import recipe_matcher
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(ingredients_imported)
+@receiver(recipes_bulk_created)
+@receiver(post_delete, sender=User)
+def invalidate_recipe_feed(sender, **kwargs):
+    """
+    Изменение рецептов, их состава или авторов сбрасывает кеш ленты после
+    фиксации транзакции: иначе запрос между сбросом и фиксацией закеширует
+    старые данные под новой версией.
+    """
+    transaction.on_commit(invalidate_all)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feed(sender, created, update_fields, **kwargs):
+    """
+    Лента показывает автора только через поля AUTHOR_FEED_FIELDS, поэтому
+    новый пользователь и сохранение других полей (например, last_login
+    при входе) кеш не сбрасывают.
+    """
+    if created or (update_fields and not AUTHOR_FEED_FIELDS & update_fields):
+        return
+    transaction.on_commit(invalidate_all)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_user_recipe_feed(sender, instance, **kwargs):
+    """Избранное, корзина и подписки влияют только на ленту их владельца."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(relation_changed)
+def invalidate_toggled_user_feed(sender, user_id, **kwargs):
+    """То же для связей, изменённых одиночными SQL-запросами."""
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(ingredients_imported)
+@receiver(recipes_bulk_created)
+def invalidate_ingredient_index(sender, **kwargs):
+    """Изменение каталога ингредиентов перестраивает индекс поиска."""
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def mark_recipe_ingredients_changed(sender, instance, **kwargs):
+    """
+    Состав рецепта перечитывается после фиксации транзакции: ингредиенты
+    рецепта создаются через bulk_create, который не отправляет сигналов.
+    """
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    transaction.on_commit(lambda: recipe_matcher.mark_dirty(recipe_id))
+
+
+@receiver(recipes_bulk_created)
+def rebuild_recipe_matcher(sender, **kwargs):
+    """Массовая загрузка рецептов перестраивает индекс подбора целиком."""
+    transaction.on_commit(recipe_matcher.invalidate)
+
+
+def _ensure_variants(field_file, max_size, variants):
+    try:
+        ensure_variants(field_file, max_size, variants)
+    except Exception:
+        logger.exception("Не удалось создать варианты %s", field_file.name)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def ensure_image_variants(sender, instance, update_fields, **kwargs):
+    """
+    Картинка, сохранённая в обход загрузки через API (админка, fixtures),
+    получает варианты после фиксации транзакции. Загрузка через API
+    к этому моменту уже сохранила их, и проверка сводится к stat файлов.
+    """
+    if sender is Recipe:
+        field, max_size, variants = "image", RECIPE_IMAGE_MAX_SIZE, RECIPE_IMAGE_VARIANTS
+    else:
+        field, max_size, variants = "avatar", AVATAR_MAX_SIZE, AVATAR_VARIANTS
+    if update_fields is not None and field not in update_fields:
+        return
+    field_file = getattr(instance, field)
+    if field_file:
+        transaction.on_commit(
+            lambda: _ensure_variants(field_file, max_size, variants)
+        )
+
+
+@receiver(recipes_bulk_created)
+def ensure_imported_image_variants(sender, **kwargs):
+    """Массовая загрузка не отправляет post_save: проверяются все рецепты."""
+
+    def ensure_all():
+        for recipe in Recipe.objects.exclude(image="").only("pk", "image").iterator():
+            _ensure_variants(
+                recipe.image, RECIPE_IMAGE_MAX_SIZE, RECIPE_IMAGE_VARIANTS
+            )
+
+    transaction.on_commit(ensure_all)
+
+
+@receiver(connection_created)
+def install_query_metrics(sender, connection, **kwargs):
+    """SQL-запросы каждого нового соединения учитываются в метриках."""
+    if collect_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(collect_queries)
@@ -2,6 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (IngredientViewSet,
+                    MetricsView,
                     RecipeViewSet,
                     UserViewSet)
 
@@ -14,5 +15,6 @@ router.register(r"users", UserViewSet, basename='user')
 urlpatterns = [
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path('', include(router.urls)),
 ]
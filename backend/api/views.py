@@ -1,37 +1,97 @@
-from datetime import datetime
-
-from django.http import HttpResponse, JsonResponse
+import io
+import tempfile
+
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django_filters import rest_framework as filters
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import BooleanField, Prefetch, Value
+from django.shortcuts import get_object_or_404
 from django.urls import reverse
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from django.utils.http import parse_etags
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import (
+    IsAdminUser,
     IsAuthenticated,
     AllowAny,
 )
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from djoser.views import UserViewSet as DjoserUserViewSet
 
+from .cache import cached_response
+from .constants import (
+    PDF_SPOOL_MAX_SIZE,
+    RECIPE_IMPORT_MAX_UPLOAD_SIZE,
+    SHOPPING_CART_EXPORT_MAX_ENTRY_SIZE,
+)
+from .exports import (
+    cart_fingerprint,
+    cart_ingredients,
+    cart_recipes,
+    current_date,
+    export_cache,
+    iter_txt,
+    stale_export_cutoff,
+    write_export,
+)
 from .filters import IngredientFilter, RecipeFilter
-from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
-from api.serializers import AvatarSerializer, SubscriptionSerializer, UserSerializer
+from .images import save_variants
+from .ingredient_index import ingredient_index
+from .metrics import request_metrics
+from .recipe_matcher import recipe_matcher
+from recipes.counters import adjust_counter
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    ShoppingCartExport,
+)
+from recipes.relations import add_relation, remove_relation
+from recipes.shortlinks import encode
+from recipes.transfer import import_recipes, iter_export
+from api.serializers import (
+    AvatarSerializer,
+    SubscriptionSerializer,
+    UserSerializer,
+    get_recipes_limit,
+)
 from .pagination import StandardResultsPagination
 from .permissions import IsOwnerOrReadOnly
 from .serializers import (
     IngredientSerializer,
     RecipeReadSerializer,
     RecipeWriteSerializer,
+    ShoppingCartExportSerializer,
     ShortRecipeSerializer,
 )
 from users.models import Subscription, User
 
-pdfmetrics.registerFont(TTFont("NTSomic-Bold", "fonts/NTSomic-Regular.ttf"))
+EXPORT_CONTENT_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "pdf": "application/pdf",
+}
+# Размер картинки рецепта в ответе: превью для списков, WebP для страницы рецепта.
+IMAGE_VARIANTS_BY_ACTION = {
+    "list": "thumb",
+    "what_can_i_cook": "thumb",
+    "retrieve": "large",
+}
+
+
+def _object_id(pk):
+    """Идентификатор из URL для запросов в обход get_object."""
+    if not str(pk).isdigit():
+        raise NotFound()
+    return int(pk)
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -43,66 +103,114 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по началу названия обслуживается из индекса в памяти."""
+        limit = request.query_params.get("limit", "")
+        body = ingredient_index.render(
+            request.query_params.get("name", ""),
+            int(limit) if limit.isdigit() else None,
+        )
+        return HttpResponse(body, content_type="application/json")
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     pagination_class = StandardResultsPagination
+    cursor_field = "created_at"
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        queryset = Recipe.objects.defer("search_vector").with_user_flags(
+            self.request.user
+        )
+        if self.action in ["list", "retrieve", "what_can_i_cook"]:
+            return queryset.with_related()
+        return queryset
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        adjust_counter(User, instance.author_id, "recipes_count", -1)
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, lambda: self._list(request, *args, **kwargs))
+
+    def _list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get("search", "").strip():
+            response.data["facets"] = {
+                "ingredients": self.filter_queryset(
+                    Recipe.objects.all()
+                ).ingredient_facet()
+            }
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            lambda: super(RecipeViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
     def get_permissions(self):
+        if self.action in ["export_recipes", "import_recipes"]:
+            return [IsAdminUser()]
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return [IsAuthenticated(), IsOwnerOrReadOnly()]
         if self.action in [
             "add_to_favorite",
             "add_to_shopping_cart",
             "download_shopping_cart",
+            "shopping_cart_export",
         ]:
             return [IsAuthenticated()]
         return [AllowAny()]
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["image_variant"] = IMAGE_VARIANTS_BY_ACTION.get(self.action)
+        return context
+
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
-    def _handle_add_remove(self, model, request, pk, serializer_class=None):
-        try:
-            recipe_instance = self.get_object()
-        except Recipe.DoesNotExist:
+    def _get_recipe(self, pk):
+        recipe = Recipe.objects.defer("search_vector").filter(pk=pk).first()
+        if recipe is None:
             raise NotFound("Рецепт не найден.")
+        return recipe
 
+    def _handle_add_remove(
+        self, model, request, pk, key="errors", added_message=None, missing_message=None
+    ):
+        """
+        Добавление и удаление рецепта одним запросом INSERT или DELETE:
+        повторные и параллельные запросы получают 400, а не ошибку базы.
+        """
         if request.method == "POST":
-            already_added = model.objects.filter(user=request.user, recipe=recipe_instance).exists()
-            if already_added:
+            recipe = self._get_recipe(pk)
+            if not add_relation(model, request.user.pk, recipe.pk):
                 return Response(
-                    {"errors": "Рецепт уже добавлен."},
+                    {key: added_message or "Рецепт уже добавлен."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-
-            model.objects.create(user=request.user, recipe=recipe_instance)
-            serializer = (
-                serializer_class(recipe_instance, context={"request": request})
-                if serializer_class
-                else RecipeReadSerializer(recipe_instance, context={"request": request})
-            )
+            serializer = ShortRecipeSerializer(recipe, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        elif request.method == "DELETE":
-            user_recipe_relation = model.objects.filter(user=request.user, recipe=recipe_instance).first()
-            if not user_recipe_relation:
-                return Response(
-                    {"errors": "Рецепт не найден в списке."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            user_recipe_relation.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not remove_relation(model, request.user.pk, _object_id(pk)):
+            # Рецепт проверяется только после неудачного удаления.
+            self._get_recipe(pk)
+            return Response(
+                {key: missing_message or "Рецепт не найден в списке."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=["post", "delete"], url_path="shopping_cart")
     def add_to_shopping_cart(self, request, pk=None):
-        return self._handle_add_remove(
-            ShoppingCart, request, pk, serializer_class=ShortRecipeSerializer
-        )
+        return self._handle_add_remove(ShoppingCart, request, pk)
 
     @action(
         detail=False,
@@ -112,126 +220,169 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def download_shopping_cart(self, request):
         user = request.user
-        shopping_cart_items = ShoppingCart.objects.filter(user=user)
-        if not shopping_cart_items.exists():
-            return JsonResponse({"detail": "Корзина пуста."}, status=400)
-        recipes = Recipe.objects.filter(
-            id__in=shopping_cart_items.values_list("recipe_id", flat=True)
-        ).prefetch_related("recipe_ingredients__ingredient", "author")
-        ingredients = (
-            Ingredient.objects.filter(ingredient_in_recipes__recipe__in=recipes)
-            .values("name", "measurement_unit")
-            .annotate(total_amount=Sum("ingredient_in_recipes__amount"))
-            .order_by("name")
-        )
-        current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         file_type = request.query_params.get("file_type", "txt").lower()
-        if file_type == "pdf":
-            return self._create_pdf_response(recipes, ingredients, current_date)
-        return self._create_txt_response(recipes, ingredients, current_date)
-
-    def _create_pdf_response(self, recipes, ingredients, current_date):
-        # Генерация PDF api/recipes/download_shopping_cart/?file_type=pdf
-        response = HttpResponse(content_type="application/pdf")
-        response["Content-Disposition"] = 'attachment; filename="shopping_cart.pdf"'
-        pdf = canvas.Canvas(response, pagesize=letter)
-        y = 750
-        pdf.setFont("NTSomic-Bold", 15)
-        y = self._draw_text(pdf, f"Корзина покупок (создана: {current_date}):", y)
-
-        for recipe in recipes:
-            y = self._draw_text(pdf, f"Автор: {recipe.author.username}", y)
-            y = self._draw_text(pdf, f"Рецепт: {recipe.name}", y)
-            y = self._draw_text(pdf, f"Текст: {recipe.text}", y)
-            y = self._draw_text(
-                pdf, f"Время приготовления: {recipe.cooking_time} мин.", y
+        if file_type != "pdf":
+            file_type = "txt"
+        fingerprint = cart_fingerprint(user, file_type)
+        if fingerprint is None:
+            return JsonResponse({"detail": "Корзина пуста."}, status=400)
+        if request.query_params.get("async") == "1":
+            return self._enqueue_export(user, file_type, fingerprint)
+        etag = f'"{fingerprint}"'
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = self._create_export_response(user, file_type, fingerprint)
+            response["Content-Disposition"] = (
+                f'attachment; filename="shopping_cart.{file_type}"'
             )
-            y = self._draw_text(pdf, "Ингредиенты:", y)
-            for ri in recipe.recipe_ingredients.all():
-                line = f"- {ri.ingredient.name} - {ri.amount} {ri.ingredient.measurement_unit}"
-                y = self._draw_text(pdf, line, y)
-            y -= 10
-            if y < 100:
-                pdf.showPage()
-                pdf.setFont("NTSomic-Bold", 15)
-                y = 750
-        y = self._draw_text(pdf, f"Всего рецептов в корзине: {recipes.count()}", y)
-        y = self._draw_text(pdf, "Список ингредиентов для покупки:", y)
-        for ing in ingredients:
-            line = f"{ing['name']} - {ing['total_amount']} {ing['measurement_unit']}"
-            y = self._draw_text(pdf, line, y)
-            if y < 100:
-                pdf.showPage()
-                pdf.setFont("NTSomic-Bold", 15)
-                y = 750
-        pdf.save()
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
         return response
 
-    def _draw_text(self, pdf_canvas, text_content, y_position, x_position=50, line_step=20):
-        pdf_canvas.drawString(x_position, y_position, text_content)
-        return y_position - line_step
-
-    def _create_txt_response(self, recipes, ingredients, current_date):
-        response = HttpResponse(content_type="text/plain", charset="utf-8")
-        response["Content-Disposition"] = 'attachment; filename="shopping_cart.txt"'
-        lines = [f"Корзина покупок (создана: {current_date}):\n"]
-        for recipe in recipes:
-            lines.append(f"Автор: {recipe.author.username}")
-            lines.append(f"Рецепт: {recipe.name}")
-            lines.append(f"Текст: {recipe.text}")
-            lines.append(f"Время приготовления: {recipe.cooking_time} мин.")
-            lines.append("Ингредиенты:")
-            for ri in recipe.recipe_ingredients.all():
-                lines.append(
-                    f"- {ri.ingredient.name} - {ri.amount} {ri.ingredient.measurement_unit}"
-                )
-            lines.append("")
-        lines.append(f"Всего рецептов в корзине: {recipes.count()}\n")
-        lines.append("Список ингредиентов для покупки:")
-        for ing in ingredients:
-            lines.append(
-                f"- {ing['name']} - {ing['total_amount']} {ing['measurement_unit']}"
+    def _enqueue_export(self, user, file_type, fingerprint):
+        """
+        Ставит генерацию файла в очередь фонового обработчика. Задание,
+        брошенное упавшим обработчиком, не переиспользуется.
+        """
+        job = (
+            ShoppingCartExport.objects.filter(
+                user=user,
+                fingerprint=fingerprint,
+                status__in=[
+                    ShoppingCartExport.PENDING,
+                    ShoppingCartExport.RUNNING,
+                    ShoppingCartExport.DONE,
+                ],
             )
-        response.write("\n".join(lines))
-        return response
+            .exclude(
+                status=ShoppingCartExport.RUNNING,
+                started_at__lt=stale_export_cutoff(),
+            )
+            .order_by("-created_at")
+            .first()
+        )
+        if job is None:
+            job = ShoppingCartExport.objects.create(
+                user=user, file_type=file_type, fingerprint=fingerprint
+            )
+        return Response(
+            ShoppingCartExportSerializer(job).data, status=status.HTTP_202_ACCEPTED
+        )
 
     @action(
-        detail=True,
-        methods=["post", "delete"],
-        url_path="favorite",
+        detail=False,
+        methods=["get"],
+        url_path=r"download_shopping_cart/(?P<job_id>\d+)",
         permission_classes=[IsAuthenticated],
     )
-    def add_to_favorite(self, request, pk=None):
-        if request.method == "POST":
-            try:
-                recipe = self.get_object()
-            except Recipe.DoesNotExist:
-                raise NotFound("Рецепт не найден.")
-
-            if Favorite.objects.filter(user=request.user, recipe=recipe).exists():
-                return Response(
-                    {"detail": "Рецепт уже добавлен в избранное."}, status=400
-                )
+    def shopping_cart_export(self, request, job_id=None):
+        """Статус фоновой выгрузки или готовый файл, если она завершена."""
+        job = get_object_or_404(
+            ShoppingCartExport, pk=job_id, user=request.user
+        )
+        if job.status != ShoppingCartExport.DONE:
+            response_status = (
+                status.HTTP_200_OK
+                if job.status == ShoppingCartExport.FAILED
+                else status.HTTP_202_ACCEPTED
+            )
+            return Response(
+                ShoppingCartExportSerializer(job).data, status=response_status
+            )
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=f"shopping_cart.{job.file_type}",
+            content_type=EXPORT_CONTENT_TYPES[job.file_type],
+        )
 
-            Favorite.objects.create(user=request.user, recipe=recipe)
+    def _create_export_response(self, user, file_type, fingerprint):
+        content_type = EXPORT_CONTENT_TYPES[file_type]
+        data = export_cache.get(fingerprint)
+        if data is not None:
+            return HttpResponse(data, content_type=content_type)
 
-            data = ShortRecipeSerializer(recipe).data
-            return Response(data, status=201)
+        if file_type == "pdf":
+            return self._create_pdf_response(user, fingerprint)
+        return StreamingHttpResponse(
+            export_cache.caching_iterator(
+                fingerprint,
+                iter_txt(cart_recipes(user), cart_ingredients(user), current_date()),
+            ),
+            content_type=content_type,
+        )
 
-        elif request.method == "DELETE":
-            try:
-                recipe = self.get_object()
-            except Recipe.DoesNotExist:
-                raise NotFound("Рецепт не найден.")
+    def _create_pdf_response(self, user, fingerprint):
+        # Генерация PDF api/recipes/download_shopping_cart/?file_type=pdf
+        buffer = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE)
+        write_export(buffer, user, "pdf")
+        if buffer.tell() <= SHOPPING_CART_EXPORT_MAX_ENTRY_SIZE:
+            buffer.seek(0)
+            data = buffer.read()
+            buffer.close()
+            export_cache.set(fingerprint, data)
+            return HttpResponse(data, content_type=EXPORT_CONTENT_TYPES["pdf"])
+        buffer.seek(0)
+        return FileResponse(buffer, content_type=EXPORT_CONTENT_TYPES["pdf"])
 
-            favorite_item = Favorite.objects.filter(
-                user=request.user, recipe=recipe
-            ).first()
-            if not favorite_item:
-                return Response({"detail": "Рецепт не найден в избранном."}, status=400)
+    @action(
+        detail=True,
+        methods=["post", "delete"],
+        url_path="favorite",
+        permission_classes=[IsAuthenticated],
+    )
+    def add_to_favorite(self, request, pk=None):
+        return self._handle_add_remove(
+            Favorite,
+            request,
+            pk,
+            key="detail",
+            added_message="Рецепт уже добавлен в избранное.",
+            missing_message="Рецепт не найден в избранном.",
+        )
 
-            favorite_item.delete()
-            return Response(status=204)
+    @action(detail=False, methods=["get"], url_path="what_can_i_cook")
+    def what_can_i_cook(self, request):
+        """
+        Рецепты, которые можно приготовить из переданных ингредиентов,
+        по убыванию доли имеющихся ингредиентов.
+        Пример: /api/recipes/what_can_i_cook/?ingredients=1,2,3&min_coverage=0.5
+        """
+        return cached_response(request, lambda: self._what_can_i_cook(request))
+
+    def _what_can_i_cook(self, request):
+        ingredient_ids = [
+            int(value)
+            for param in request.query_params.getlist("ingredients")
+            for value in param.split(",")
+            if value.strip().isdigit()
+        ]
+        if not ingredient_ids:
+            return Response(
+                {"ingredients": "Укажите хотя бы один ингредиент."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            min_coverage = float(request.query_params.get("min_coverage", 0))
+        except ValueError:
+            min_coverage = 0.0
+
+        matches = recipe_matcher.match(ingredient_ids, min_coverage)
+        page = self.paginate_queryset(matches)
+        recipes = self.get_queryset().in_bulk([recipe_id for recipe_id, *_ in page])
+        data = []
+        for recipe_id, coverage, matched in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            item = RecipeReadSerializer(
+                recipe, context=self.get_serializer_context()
+            ).data
+            item["coverage"] = round(coverage, 3)
+            item["matched_ingredients"] = matched
+            data.append(item)
+        return self.get_paginated_response(data)
 
     @action(
         detail=True,
@@ -243,10 +394,54 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         Возвращает абсолютную короткую ссылку на рецепт по его идентификатору.
         """
-        short_path = reverse("short-link", args=[pk])
+        short_path = reverse("short-link", args=[encode(_object_id(pk))])
         absolute_short_link = request.build_absolute_uri(short_path)
         return Response({"short-link": absolute_short_link})
 
+    @action(detail=False, methods=["get"], url_path="export")
+    def export_recipes(self, request):
+        """Потоковая выгрузка всех рецептов в JSON Lines; только для администраторов."""
+        response = StreamingHttpResponse(
+            iter_export(with_hashes="with_hashes" in request.query_params),
+            content_type="application/x-ndjson; charset=utf-8",
+        )
+        response["Content-Disposition"] = 'attachment; filename="recipes.jsonl"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_recipes(self, request):
+        """
+        Импорт выгрузки из поля file (multipart/form-data) размером
+        до RECIPE_IMPORT_MAX_UPLOAD_SIZE. Картинки должны уже лежать
+        в хранилище: по HTTP переносятся только записи.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": "Загрузите файл выгрузки."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if upload.size > RECIPE_IMPORT_MAX_UPLOAD_SIZE:
+            return Response(
+                {
+                    "file": "Размер выгрузки не должен превышать "
+                    f"{RECIPE_IMPORT_MAX_UPLOAD_SIZE // (1024 * 1024)} МБ; "
+                    "большие выгрузки импортируйте командой import_recipes."
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        try:
+            result = import_recipes(io.TextIOWrapper(upload, encoding="utf-8"))
+        except UnicodeDecodeError:
+            return Response(
+                {
+                    "file": "Файл выгрузки должен быть в кодировке UTF-8; "
+                    "строки до ошибки импортированы."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(result, status=status.HTTP_200_OK)
+
 
 class UserViewSet(DjoserUserViewSet):
     """Представление для пользователей с дополнительной информацией о подписке и аватаре."""
@@ -254,6 +449,7 @@ class UserViewSet(DjoserUserViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = StandardResultsPagination
+    cursor_field = "date_joined"
 
     def get_permissions(self):
         """Настройка прав доступа в зависимости от выполняемого действия."""
@@ -274,22 +470,16 @@ class UserViewSet(DjoserUserViewSet):
     def subscribe(self, request, id=None):
         """Подписка и отписка на пользователя."""
         current_user = request.user
-        target_user = self.get_object()
 
         if request.method == "POST":
+            target_user = self.get_object()
             if current_user == target_user:
                 return Response(
                     {"error": "Невозможно подписаться на самого себя."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            subscription_instance, is_new_subscription = (
-                Subscription.objects.get_or_create(
-                    user=current_user, author=target_user
-                )
-            )
-
-            if not is_new_subscription:
+            if not add_relation(Subscription, current_user.pk, target_user.pk):
                 return Response(
                     {
                         "error": f"Вы уже подписаны на пользователя {target_user.username} (ID: {target_user.id})."
@@ -304,22 +494,34 @@ class UserViewSet(DjoserUserViewSet):
                 subscription_serializer.data, status=status.HTTP_201_CREATED
             )
 
-        subscription_instance = Subscription.objects.filter(
-            user=current_user, author=target_user
-        ).first()
-        if not subscription_instance:
+        if not remove_relation(Subscription, current_user.pk, _object_id(id)):
+            self.get_object()
             return Response(
                 {"error": "Вы не подписаны на этого пользователя."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        subscription_instance.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=["get"], url_path="subscriptions")
     def subscriptions(self, request):
         current_user = request.user
-
-        authors = User.objects.filter(subscribers__user=current_user)
+        recipes = Recipe.objects.filter(author__subscribers__user=current_user)
+        recipes_limit = get_recipes_limit(request)
+        if recipes_limit is not None:
+            recipes = recipes.limited_per_author(recipes_limit)
+        authors = (
+            User.objects.filter(subscribers__user=current_user)
+            .annotate(is_subscribed=Value(True, output_field=BooleanField()))
+            .prefetch_related(
+                Prefetch(
+                    "recipes",
+                    queryset=recipes.only(
+                        "id", "author_id", "name", "image", "cooking_time"
+                    ),
+                    to_attr="recipes_preview",
+                )
+            )
+        )
 
         page = self.paginate_queryset(authors)
         if page is not None:
@@ -343,7 +545,10 @@ class UserViewSet(DjoserUserViewSet):
         user = request.user
 
         if request.method == "DELETE":
-            user.avatar.delete(save=True)
+            # Файл может быть общим с другими пользователями; неиспользуемые
+            # файлы удаляет collect_media_garbage.
+            user.avatar = None
+            user.save(update_fields=["avatar"])
             return Response(
                 {"detail": "Аватар успешно удалён."}, status=status.HTTP_204_NO_CONTENT
             )
@@ -351,8 +556,23 @@ class UserViewSet(DjoserUserViewSet):
         avatar_serializer = AvatarSerializer(data=request.data)
         if avatar_serializer.is_valid():
             avatar = avatar_serializer.validated_data["avatar"]
-            user.avatar = avatar
-            user.save()
+            # Варианты сохраняются до ensure_image_variants (on_commit).
+            with transaction.atomic():
+                user.avatar = avatar
+                user.save(update_fields=["avatar"])
+                save_variants(user.avatar, avatar)
             return Response({"avatar": user.avatar.url}, status=status.HTTP_200_OK)
 
         return Response(avatar_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class MetricsView(APIView):
+    """Метрики запросов процесса в формате Prometheus; только для администраторов."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            request_metrics.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
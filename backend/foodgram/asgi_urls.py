@@ -0,0 +1,23 @@
+from django.urls import include, path
+
+from api import async_views
+
+# Под ASGI читающие эндпоинты обслуживаются асинхронными представлениями,
+# остальные маршруты совпадают с foodgram.urls.
+urlpatterns = [
+    path("api/recipes/", async_views.recipe_list),
+    path(
+        "api/recipes/download_shopping_cart/",
+        async_views.recipe_shopping_cart,
+    ),
+    path("api/recipes/<int:pk>/", async_views.recipe_detail),
+    path("api/ingredients/", async_views.ingredient_list),
+    path("api/ingredients/<int:pk>/", async_views.ingredient_detail),
+    path(
+        "s/<int:pk>/",
+        async_views.legacy_short_link_redirect,
+        name="legacy-short-link",
+    ),
+    path("s/<str:code>/", async_views.short_link_redirect, name="short-link"),
+    path("", include("foodgram.urls")),
+]
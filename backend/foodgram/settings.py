@@ -20,6 +20,13 @@ CSRF_TRUSTED_ORIGINS = [f"http://{host}" for host in ALLOWED_HOSTS]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Загружаемые файлы сразу пишутся во временные файлы, а не в память.
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+EXPORTS_ROOT = os.path.join(BASE_DIR, "exports")
+
 STATIC_URL = "/static/backend/"
 STATIC_ROOT = os.path.join(BASE_DIR, "static/backend")
 
@@ -31,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "djoser",
@@ -49,10 +57,18 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.QueryMetricsMiddleware",
 ]
 
 ROOT_URLCONF = "foodgram.urls"
 
+# Режим ASGI (foodgram/asgi.py): читающие эндпоинты становятся асинхронными,
+# а синхронный WhiteNoiseMiddleware отключается — иначе Django выполнял бы
+# всю цепочку обработки в одном потоке. Статику в этом режиме отдаёт nginx.
+if os.getenv("DJANGO_ASGI") == "1":
+    ROOT_URLCONF = "foodgram.asgi_urls"
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -82,6 +98,18 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django_redis.cache.RedisCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    }
+}
+
+RECIPES_CACHE_TIMEOUT = int(os.getenv("RECIPES_CACHE_TIMEOUT", 300))
+
+# Запросы, выполнившие больше SQL-запросов, логируются вместе с SQL; 0 — выключено.
+SLOW_REQUEST_QUERY_THRESHOLD = int(os.getenv("SLOW_REQUEST_QUERY_THRESHOLD", 50))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -3,14 +3,17 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from recipes.views import short_link_redirect
+from recipes.views import legacy_short_link_redirect, short_link_redirect
 
 
 urlpatterns = [
 
     path('api/', include('api.urls')),
     path("admin/", admin.site.urls),
-    path("s/<int:pk>/", short_link_redirect, name="short-link"),
+    path(
+        "s/<int:pk>/", legacy_short_link_redirect, name="legacy-short-link"
+    ),
+    path("s/<str:code>/", short_link_redirect, name="short-link"),
 
 ]
 
@@ -1,6 +1,13 @@
 from django.contrib import admin
 
-from .models import Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart
+from .models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingCartExport,
+)
 from .constants import DEFAULT_EMPTY_INGREDIENT_FORMS, MIN_INGREDIENT_COUNT
 
 
@@ -18,15 +25,12 @@ class RecipeIngredientInline(admin.TabularInline):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'author', 'favorites_count')
+    readonly_fields = ('favorites_count', 'in_carts_count')
     search_fields = ('name', 'author__username')
     list_filter = ('author', 'name')
     ordering = ("name",)
     inlines = [RecipeIngredientInline]
 
-    def favorites_count(self, recipe):
-        return Favorite.objects.filter(recipe=recipe).count()
-    favorites_count.short_description = "Добавлений в избранное"
-
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
@@ -55,3 +59,10 @@ class FavoriteAdmin(admin.ModelAdmin):
     list_display = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
     list_filter = ("user",)
+
+
+@admin.register(ShoppingCartExport)
+class ShoppingCartExportAdmin(admin.ModelAdmin):
+    list_display = ("user", "file_type", "status", "created_at", "finished_at")
+    search_fields = ("user__username",)
+    list_filter = ("status", "file_type")
@@ -0,0 +1,11 @@
+from django.core.cache import cache
+
+
+def increment_counter(key):
+    """Атомарно увеличивает счётчик в кеше, создавая его при отсутствии."""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
@@ -5,3 +5,18 @@ MIN_TIME_COOKING = 1
 MIN_INGREDIENT_AMOUNT = 1
 DEFAULT_EMPTY_INGREDIENT_FORMS = 1
 MIN_INGREDIENT_COUNT = 1
+EXPORT_FILE_TYPE_MAX_LENGTH = 3
+EXPORT_STATUS_MAX_LENGTH = 10
+EXPORT_FINGERPRINT_LENGTH = 64
+SEARCH_CONFIG = "russian"
+SEARCH_FACET_SIZE = 10
+IMPORT_BATCH_SIZE = 10000
+RECIPE_TRANSFER_BATCH_SIZE = 1000
+MEDIA_GC_GRACE_MINUTES = 60
+SHORT_LINK_ID_BITS = 40
+# Нечётный множитель и сдвиг перемешивают идентификаторы рецептов в коротких
+# ссылках; после публикации ссылок их менять нельзя.
+SHORT_LINK_MULTIPLIER = 0x5DEECE66D
+SHORT_LINK_OFFSET = 0x2F9A1C7B3E
+SHORT_LINK_CACHE_SIZE = 100000
+SHORT_LINK_MAX_AGE = 3600
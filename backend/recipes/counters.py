@@ -0,0 +1,70 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Subscription, User
+from .models import Favorite, Recipe, ShoppingCart
+
+RECIPE_COUNTERS = {
+    Favorite: "favorites_count",
+    ShoppingCart: "in_carts_count",
+}
+
+
+def adjust_counter(model, pk, field, delta):
+    """
+    Атомарно изменяет счётчик одной строки выражением F() без чтения строки.
+    Счётчик не опускается ниже нуля: строки, созданные в обход API
+    (loaddata, админка), могут иметь нулевой счётчик до recount_counters.
+    """
+    model.objects.filter(pk=pk).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def _count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+COUNTER_SOURCES = (
+    (Recipe, "favorites_count", Favorite, "recipe"),
+    (Recipe, "in_carts_count", ShoppingCart, "recipe"),
+    (User, "recipes_count", Recipe, "author"),
+    (User, "subscribers_count", Subscription, "author"),
+)
+
+
+def recount_counter(model, counter, pks):
+    """Пересчитывает один счётчик у строк pks одним запросом UPDATE."""
+    source, field = next(
+        (source, field)
+        for counter_model, name, source, field in COUNTER_SOURCES
+        if counter_model is model and name == counter
+    )
+    model.objects.filter(pk__in=pks).update(**{counter: _count_subquery(source, field)})
+
+
+def reconcile_counters():
+    """
+    Пересчитывает все денормализованные счётчики и исправляет
+    расхождения. Возвращает число исправленных строк по каждому счётчику.
+    """
+    fixed = {}
+    for model, counter, source, field in COUNTER_SOURCES:
+        actual = _count_subquery(source, field)
+        drifted = list(
+            model.objects.annotate(actual=actual)
+            .exclude(**{counter: F("actual")})
+            .values_list("pk", flat=True)
+        )
+        if drifted:
+            model.objects.filter(pk__in=drifted).update(**{counter: actual})
+        fixed[f"{model.__name__}.{counter}"] = len(drifted)
+    return fixed
@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .constants import (
+    IMPORT_BATCH_SIZE,
+    INGREDIENT_MEASUREMENT_UNIT_MAX_LENGTH,
+    INGREDIENT_NAME_MAX_LENGTH,
+)
+from .models import Ingredient
+from .signals import ingredients_imported
+
+FORMATS = ("csv", "jsonl", "json")
+
+
+def detect_format(path):
+    """Определяет формат файла по расширению."""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "ndjson":
+        return "jsonl"
+    if extension not in FORMATS:
+        raise ValueError(f"Неизвестный формат файла: {path}")
+    return extension
+
+
+def _read_csv(file):
+    for row in csv.reader(file):
+        if len(row) < 2:
+            yield None
+            continue
+        yield row[0], row[1]
+
+
+def _read_jsonl(file):
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            yield item["name"], item["measurement_unit"]
+        except (ValueError, KeyError, TypeError):
+            yield None
+
+
+def _read_json(file):
+    """Старый формат — массив объектов; он читается целиком."""
+    for item in json.load(file):
+        yield item.get("name"), item.get("measurement_unit")
+
+
+READERS = {"csv": _read_csv, "jsonl": _read_jsonl, "json": _read_json}
+
+
+def _clean(row):
+    if row is None:
+        return None
+    name, unit = row
+    if not isinstance(name, str) or not isinstance(unit, str):
+        return None
+    name, unit = name.strip(), unit.strip()
+    if (
+        not name
+        or not unit
+        or len(name) > INGREDIENT_NAME_MAX_LENGTH
+        or len(unit) > INGREDIENT_MEASUREMENT_UNIT_MAX_LENGTH
+    ):
+        return None
+    return name, unit
+
+
+def batches(rows, batch_size):
+    """Разбивает итератор строк на списки по batch_size элементов."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _upsert_batch(rows):
+    """Вставка и обновление порции средствами ORM для любых СУБД."""
+    unique = dict(rows)
+    existing = {
+        ingredient.name: ingredient
+        for ingredient in Ingredient.objects.filter(name__in=unique)
+    }
+    new = [
+        Ingredient(name=name, measurement_unit=unit)
+        for name, unit in unique.items()
+        if name not in existing
+    ]
+    changed = []
+    for name, ingredient in existing.items():
+        if ingredient.measurement_unit != unique[name]:
+            ingredient.measurement_unit = unique[name]
+            changed.append(ingredient)
+    Ingredient.objects.bulk_create(new)
+    Ingredient.objects.bulk_update(changed, ["measurement_unit"])
+    return len(new), len(changed)
+
+
+def _import_with_orm(rows, batch_size):
+    inserted = updated = 0
+    for batch in batches(rows, batch_size):
+        batch_inserted, batch_updated = _upsert_batch(batch)
+        inserted += batch_inserted
+        updated += batch_updated
+    return inserted, updated
+
+
+def _import_with_copy(rows, batch_size):
+    """
+    Загружает строки в промежуточную таблицу через COPY порциями
+    и переносит их в каталог одним INSERT ... ON CONFLICT DO UPDATE.
+    Для повторяющихся названий побеждает последняя строка файла.
+    """
+    table = Ingredient._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE ingredient_import "
+            "(position bigserial, name text, measurement_unit text) "
+            "ON COMMIT DROP"
+        )
+        for batch in batches(rows, batch_size):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor.cursor.copy_expert(
+                "COPY ingredient_import (name, measurement_unit) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        cursor.execute(
+            f"""
+            WITH upserted AS (
+                INSERT INTO {table} (name, measurement_unit)
+                SELECT DISTINCT ON (name) name, measurement_unit
+                FROM ingredient_import
+                ORDER BY name, position DESC
+                ON CONFLICT (name) DO UPDATE
+                SET measurement_unit = EXCLUDED.measurement_unit
+                WHERE {table}.measurement_unit
+                    IS DISTINCT FROM EXCLUDED.measurement_unit
+                RETURNING xmax = 0 AS inserted
+            )
+            SELECT
+                count(*) FILTER (WHERE inserted),
+                count(*) FILTER (WHERE NOT inserted)
+            FROM upserted
+            """
+        )
+        return cursor.fetchone()
+
+
+def import_ingredients(file, file_format, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Потоково импортирует ингредиенты из CSV (название, единица измерения),
+    JSON Lines или JSON-массива: новые добавляются, у существующих
+    обновляется единица измерения.
+    Возвращает количество прочитанных, добавленных, обновлённых
+    и пропущенных строк; пропущенными считаются некорректные строки,
+    повторы и строки без изменений.
+    """
+    total = 0
+
+    def clean_rows():
+        nonlocal total
+        for row in READERS[file_format](file):
+            total += 1
+            cleaned = _clean(row)
+            if cleaned is not None:
+                yield cleaned
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            inserted, updated = _import_with_copy(clean_rows(), batch_size)
+        else:
+            inserted, updated = _import_with_orm(clean_rows(), batch_size)
+    if inserted or updated:
+        ingredients_imported.send(sender=Ingredient)
+    return {
+        "total": total,
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": total - inserted - updated,
+    }
@@ -0,0 +1,92 @@
+import os
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.constants import MEDIA_GC_GRACE_MINUTES
+from recipes.models import Recipe
+from users.models import User
+
+IMAGE_FIELDS = ((Recipe, "image"), (User, "avatar"))
+
+
+def _stem(name):
+    """recipes/images/abc.jpg и recipes/images/abc.thumb.webp -> recipes/images/abc."""
+    directory, basename = os.path.split(name)
+    return os.path.join(directory, basename.split(".", 1)[0])
+
+
+def _megabytes(size):
+    return f"{size / 2**20:.1f} МБ"
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет из хранилища картинки рецептов и аватары, на которые "
+        "не ссылается ни один объект, вместе с их вариантами, и печатает, "
+        "сколько места экономит хранение одинаковых файлов в одном экземпляре."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать, что будет удалено.",
+        )
+        parser.add_argument(
+            "--grace-minutes",
+            type=int,
+            default=MEDIA_GC_GRACE_MINUTES,
+            help="Не трогать файлы моложе указанного возраста: они могут "
+            "принадлежать ещё не зафиксированным транзакциям.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+        for model, field_name in IMAGE_FIELDS:
+            field = model._meta.get_field(field_name)
+            storage = field.storage
+            references = Counter(
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{field_name: None})
+                .values_list(field_name, flat=True)
+                .iterator()
+            )
+            referenced = {_stem(name) for name in references}
+            directory = field.upload_to.rstrip("/")
+            try:
+                files = storage.listdir(directory)[1]
+            except FileNotFoundError:
+                files = []
+            groups = defaultdict(list)
+            for basename in files:
+                name = f"{directory}/{basename}"
+                if _stem(name) not in referenced:
+                    groups[_stem(name)].append(name)
+            removed = freed = 0
+            for names in groups.values():
+                # Оригинал и варианты удаляются вместе: свежий оригинал
+                # (в том числе переиспользованный) сохраняет и варианты.
+                if any(storage.get_modified_time(name) > cutoff for name in names):
+                    continue
+                for name in names:
+                    freed += storage.size(name)
+                    removed += 1
+                    if not options["dry_run"]:
+                        storage.delete(name)
+            saved = sum(
+                (count - 1) * storage.size(name)
+                for name, count in references.items()
+                if count > 1 and storage.exists(name)
+            )
+            action = "будет удалено" if options["dry_run"] else "удалено"
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model.__name__}.{field_name}: {action} {removed} файлов "
+                    f"({_megabytes(freed)}); ссылок {sum(references.values())} "
+                    f"на {len(references)} файлов, дедупликация экономит "
+                    f"{_megabytes(saved)}."
+                )
+            )
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.constants import RECIPE_TRANSFER_BATCH_SIZE
+from recipes.transfer import iter_export
+
+
+class Command(BaseCommand):
+    help = "Выгружает рецепты в JSON Lines для переноса или резервной копии."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-", help="Файл выгрузки; «-» — stdout."
+        )
+        parser.add_argument(
+            "--with-hashes",
+            action="store_true",
+            help="Добавить SHA-256 картинок: импорт пропустит уже сохранённые.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RECIPE_TRANSFER_BATCH_SIZE,
+            help="Количество рецептов в одной порции.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        lines = iter_export(
+            with_hashes=options["with_hashes"], batch_size=options["batch_size"]
+        )
+        total = 0
+        try:
+            if options["path"] == "-":
+                for total, line in enumerate(lines, 1):
+                    sys.stdout.write(line)
+                return
+            with open(options["path"], "w", encoding="utf-8") as file:
+                for total, line in enumerate(lines, 1):
+                    file.write(line)
+        except OSError as error:
+            raise CommandError(f"Ошибка при выгрузке: {error}")
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else total
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Выгружено {total} рецептов в {options['path']} "
+                f"за {elapsed:.2f} с ({rate:.0f} рецептов/с)."
+            )
+        )
@@ -1,32 +1,55 @@
 import os
-import json
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
-from recipes.models import Ingredient
+from recipes.constants import IMPORT_BATCH_SIZE
+from recipes.importing import FORMATS, detect_format, import_ingredients
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **kwargs):
-        self.stdout.write(self.style.SUCCESS("Импортинг ингредиентов..."))
+    help = "Импортирует ингредиенты из CSV, JSON Lines или JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=os.path.join("data", "ingredients.csv"),
+            help="Путь к файлу (по умолчанию data/ingredients.csv).",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Формат файла; по умолчанию определяется по расширению.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help="Количество строк в одной порции.",
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options["path"])
+        self.stdout.write(self.style.SUCCESS(f"Импорт ингредиентов из {path}..."))
         try:
-            base_dir = os.path.abspath(os.getcwd())
-            fixture_path = os.path.join(base_dir, "data", "ingredients.json")
-
-            with open(fixture_path, encoding="utf-8") as file:
-                data = json.load(file)
-
-            ingredients_to_create = [Ingredient(**item) for item in data]
-
-            Ingredient.objects.bulk_create(ingredients_to_create, ignore_conflicts=True)
-
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Импорт данных завершён! Добавлено {len(ingredients_to_create)} новых ингредиентов."
+            file_format = options["format"] or detect_format(path)
+            started = time.perf_counter()
+            with open(path, encoding="utf-8", newline="") as file:
+                result = import_ingredients(
+                    file, file_format, batch_size=options["batch_size"]
                 )
+            elapsed = time.perf_counter() - started
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Ошибка при импорте {path}: {error}")
+
+        rate = result["total"] / elapsed if elapsed else result["total"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импорт данных завершён за {elapsed:.2f} с "
+                f"({rate:.0f} строк/с): прочитано {result['total']}, "
+                f"добавлено {result['inserted']}, "
+                f"обновлено {result['updated']}, "
+                f"пропущено {result['skipped']}."
             )
-
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f"Ошибка при импорте {fixture_path}: {e}")
-            )
+        )
@@ -0,0 +1,52 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.constants import RECIPE_TRANSFER_BATCH_SIZE
+from recipes.transfer import import_recipes
+
+
+class Command(BaseCommand):
+    help = "Импортирует рецепты из выгрузки export_recipes (JSON Lines)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу выгрузки.")
+        parser.add_argument(
+            "--media-root",
+            help="Каталог media исходного окружения: картинки копируются "
+            "из него с дедупликацией по содержимому. Без него пути "
+            "картинок сохраняются как есть.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RECIPE_TRANSFER_BATCH_SIZE,
+            help="Количество рецептов в одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options["path"])
+        self.stdout.write(self.style.SUCCESS(f"Импорт рецептов из {path}..."))
+        try:
+            started = time.perf_counter()
+            with open(path, encoding="utf-8") as file:
+                result = import_recipes(
+                    file,
+                    media_root=options["media_root"],
+                    batch_size=options["batch_size"],
+                )
+            elapsed = time.perf_counter() - started
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Ошибка при импорте {path}: {error}")
+
+        rate = result["total"] / elapsed if elapsed else result["total"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импорт завершён за {elapsed:.2f} с ({rate:.0f} строк/с): "
+                f"прочитано {result['total']}, добавлено {result['imported']}, "
+                f"пропущено {result['skipped']}; картинок записано "
+                f"{result['images_written']}, переиспользовано "
+                f"{result['images_reused']}, не найдено {result['images_missing']}."
+            )
+        )
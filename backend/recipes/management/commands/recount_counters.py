@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики избранного, корзин, рецептов и подписчиков."
+
+    def handle(self, *args, **kwargs):
+        for counter, fixed in reconcile_counters().items():
+            self.stdout.write(
+                self.style.SUCCESS(f"{counter}: исправлено строк {fixed}")
+            )
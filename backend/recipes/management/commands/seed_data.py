@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.seeding import seed_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими пользователями, рецептами, избранным, "
+        "корзинами и подписками. При одинаковом --seed данные совпадают."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--ingredients", type=int, default=2000)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--favorites-per-user", type=int, default=20)
+        parser.add_argument("--carts-per-user", type=int, default=5)
+        parser.add_argument("--subscriptions-per-user", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Префикс имён пользователей и ингредиентов; должен быть "
+            "уникальным для каждого запуска на одной базе.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            counts = seed_data(
+                users=options["users"],
+                recipes=options["recipes"],
+                ingredients=options["ingredients"],
+                ingredients_per_recipe=options["ingredients_per_recipe"],
+                favorites_per_user=options["favorites_per_user"],
+                carts_per_user=options["carts_per_user"],
+                subscriptions_per_user=options["subscriptions_per_user"],
+                random_seed=options["seed"],
+                prefix=options["prefix"],
+                batch_size=options["batch_size"],
+            )
+        elapsed = time.perf_counter() - started
+        for model, count in counts.items():
+            self.stdout.write(f"{model}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Синтетические данные созданы за {elapsed:.1f} с.")
+        )
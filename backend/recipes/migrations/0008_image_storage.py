@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:40
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.get_image_storage, upload_to='recipes/images/', verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcartexport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Время начала'),
+        ),
+    ]
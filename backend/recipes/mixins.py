@@ -0,0 +1,26 @@
+class CounterFieldsMixin:
+    """
+    Не даёт полному save() существующей строки перезаписать денормализованные
+    счётчики counter_fields: их меняют только запросы UPDATE с F(),
+    а значение в памяти могло устареть с момента загрузки объекта.
+    Чтобы записать счётчик через save(), его нужно явно указать в update_fields.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+            and not self._state.adding
+            and self.pk is not None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
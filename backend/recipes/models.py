@@ -1,17 +1,177 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.core.files.storage import FileSystemStorage
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
-from users.models import User
+from users.models import Subscription, User
 from .constants import (
+    SEARCH_CONFIG,
+    SEARCH_FACET_SIZE,
+    EXPORT_FILE_TYPE_MAX_LENGTH,
+    EXPORT_FINGERPRINT_LENGTH,
+    EXPORT_STATUS_MAX_LENGTH,
     RECIPE_NAME_MAX_LENGTH,
     INGREDIENT_NAME_MAX_LENGTH,
     INGREDIENT_MEASUREMENT_UNIT_MAX_LENGTH,
     MIN_INGREDIENT_AMOUNT,
     MIN_TIME_COOKING
 )
+from .mixins import CounterFieldsMixin
+from .storage import get_image_storage
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов рецептов с выборкой связанных данных."""
+
+    def with_related(self):
+        """Подгружает автора и ингредиенты рецептов фиксированным числом запросов."""
+        return self.select_related("author").prefetch_related(
+            Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredient.objects.select_related("ingredient"),
+            )
+        )
+
+    def limited_per_author(self, limit):
+        """
+        Оставляет не больше limit последних рецептов каждого автора.
+        Нумерация внутри автора считается оконной функцией ROW_NUMBER().
+        """
+        ranked = (
+            self.annotate(
+                recipe_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("author_id")],
+                    order_by=[F("created_at").desc(), F("name").asc()],
+                )
+            )
+            .order_by()
+            .values("pk", "recipe_rank")
+        )
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(
+            pk__in=RawSQL(
+                f"SELECT ranked.id FROM ({sql}) AS ranked "
+                "WHERE ranked.recipe_rank <= %s",
+                (*params, limit),
+            )
+        )
 
+    def _is_postgresql(self):
+        return connections[self.db].vendor == "postgresql"
+
+    def update_search_vector(self):
+        """Пересчитывает поисковый вектор: название весомее описания."""
+        if not self._is_postgresql():
+            return 0
+        return self.update(
+            search_vector=(
+                SearchVector("name", weight="A", config=SEARCH_CONFIG)
+                + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+            )
+        )
 
-class Recipe(models.Model):
+    def search(self, term):
+        """
+        Ищет рецепты по названию, описанию и названиям ингредиентов
+        и упорядочивает их по релевантности.
+
+        В PostgreSQL используется полнотекстовый поиск по search_vector
+        и триграммное сходство названия, в остальных СУБД — поиск подстроки.
+        """
+        has_ingredient = Exists(
+            RecipeIngredient.objects.filter(
+                recipe=OuterRef("pk"), ingredient__name__istartswith=term
+            )
+        )
+        if not self._is_postgresql():
+            return (
+                self.annotate(
+                    search_rank=Case(
+                        When(name__icontains=term, then=Value(2.0)),
+                        When(text__icontains=term, then=Value(1.0)),
+                        default=Value(0.5),
+                        output_field=FloatField(),
+                    )
+                )
+                .filter(
+                    Q(name__icontains=term) | Q(text__icontains=term) | has_ingredient
+                )
+                .order_by("-search_rank", "-created_at", "name")
+            )
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            self.annotate(
+                search_rank=SearchRank(F("search_vector"), query)
+                + TrigramSimilarity("name", term)
+            )
+            .filter(
+                Q(search_vector=query)
+                | Q(name__trigram_similar=term)
+                | has_ingredient
+            )
+            .order_by("-search_rank", "-created_at", "name")
+        )
+
+    def ingredient_facet(self, size=SEARCH_FACET_SIZE):
+        """Самые частые ингредиенты среди рецептов выборки."""
+        return list(
+            RecipeIngredient.objects.filter(
+                recipe__in=self.order_by().values("pk")
+            )
+            .values("ingredient_id", "ingredient__name")
+            .annotate(count=Count("recipe_id"))
+            .order_by("-count", "ingredient__name")[:size]
+        )
+
+    def with_user_flags(self, user):
+        """
+        Аннотирует рецепты флагами избранного, корзины и подписки на автора
+        для указанного пользователя.
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+                is_author_subscribed=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_author_subscribed=Exists(
+                Subscription.objects.filter(user=user, author=OuterRef("author"))
+            ),
+        )
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецепта."""
 
     author = models.ForeignKey(
@@ -30,7 +190,11 @@ class Recipe(models.Model):
         verbose_name="Описание приготовления",
         help_text="Опишите процесс приготовления",
     )
-    image = models.ImageField(upload_to="recipes/images/", verbose_name="Картинка")
+    image = models.ImageField(
+        upload_to="recipes/images/",
+        storage=get_image_storage,
+        verbose_name="Картинка",
+    )
     cooking_time = models.PositiveIntegerField(
         "Время приготовления (в минутах)",
         validators=[MinValueValidator(MIN_TIME_COOKING)],
@@ -46,11 +210,37 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name="Время публикации",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Время изменения",
+    )
+    favorites_count = models.PositiveIntegerField(
+        "Добавлений в избранное", default=0, editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        "Добавлений в корзину", default=0, editable=False
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    counter_fields = ("favorites_count", "in_carts_count")
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ("-created_at", "name")
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], name="recipe_created_id_idx"
+            ),
+            models.Index(
+                fields=["-created_at", "name"], name="recipe_created_name_idx"
+            ),
+            models.Index(
+                fields=["author", "-created_at"], name="recipe_author_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -76,6 +266,13 @@ class Ingredient(models.Model):
         ordering = ["name"]
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
+        indexes = [
+            models.Index(
+                fields=["name"],
+                name="ingredient_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["name", "measurement_unit"],
@@ -111,6 +308,11 @@ class RecipeIngredient(models.Model):
     class Meta:
         verbose_name = "Ингредиент в рецепте"
         verbose_name_plural = "Ингредиенты в рецепте"
+        indexes = [
+            models.Index(
+                fields=["ingredient", "recipe"], name="ingredient_recipe_idx"
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["recipe", "ingredient"],
@@ -141,6 +343,9 @@ class ShoppingCart(models.Model):
     class Meta:
         verbose_name = "Покупка"
         verbose_name_plural = "Список покупок"
+        indexes = [
+            models.Index(fields=["recipe", "user"], name="cart_recipe_user_idx"),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["user", "recipe"],
@@ -172,6 +377,11 @@ class Favorite(models.Model):
         verbose_name = "Избранное"
         verbose_name_plural = "Избранные рецепты"
         ordering = ["user"]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="favorite_recipe_user_idx"
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["user", "recipe"],
@@ -181,3 +391,60 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f"{self.user.username} в избранном: {self.recipe.name}"
+
+
+def get_exports_storage():
+    """Хранилище выгрузок вне MEDIA_ROOT, недоступное напрямую через nginx."""
+    return FileSystemStorage(location=settings.EXPORTS_ROOT)
+
+
+class ShoppingCartExport(models.Model):
+    """Задание на фоновую генерацию файла списка покупок."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="cart_exports",
+        verbose_name="Пользователь",
+    )
+    file_type = models.CharField(
+        "Формат файла", max_length=EXPORT_FILE_TYPE_MAX_LENGTH
+    )
+    fingerprint = models.CharField(
+        "Хеш содержимого корзины", max_length=EXPORT_FINGERPRINT_LENGTH
+    )
+    status = models.CharField(
+        "Статус",
+        max_length=EXPORT_STATUS_MAX_LENGTH,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    file = models.FileField(
+        "Файл",
+        upload_to="shopping_carts/",
+        storage=get_exports_storage,
+        blank=True,
+    )
+    error = models.TextField("Ошибка", blank=True)
+    created_at = models.DateTimeField("Время создания", auto_now_add=True)
+    started_at = models.DateTimeField("Время начала", blank=True, null=True)
+    finished_at = models.DateTimeField("Время завершения", blank=True, null=True)
+
+    class Meta:
+        ordering = ("created_at",)
+        verbose_name = "Выгрузка списка покупок"
+        verbose_name_plural = "Выгрузки списков покупок"
+
+    def __str__(self):
+        return f"{self.user.username}: {self.file_type} ({self.status})"
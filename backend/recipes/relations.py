@@ -0,0 +1,75 @@
+from django.db import connection, transaction
+
+from users.models import Subscription, User
+from .counters import adjust_counter
+from .models import Favorite, Recipe, ShoppingCart
+from .signals import relation_changed
+
+# Связь «пользователь → объект»: поле объекта и счётчик, который она меняет.
+RELATIONS = {
+    Favorite: ("recipe", Recipe, "favorites_count"),
+    ShoppingCart: ("recipe", Recipe, "in_carts_count"),
+    Subscription: ("author", User, "subscribers_count"),
+}
+
+
+def _execute(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _columns(model):
+    target = RELATIONS[model][0]
+    quote = connection.ops.quote_name
+    return (
+        quote(model._meta.db_table),
+        quote(model._meta.get_field("user").column),
+        quote(model._meta.get_field(target).column),
+    )
+
+
+def _changed(model, user_id, target_id, delta):
+    _, counter_model, counter = RELATIONS[model]
+    adjust_counter(counter_model, target_id, counter, delta)
+    transaction.on_commit(
+        lambda: relation_changed.send(
+            sender=model, user_id=user_id, target_id=target_id, added=delta > 0
+        )
+    )
+
+
+@transaction.atomic
+def add_relation(model, user_id, target_id):
+    """
+    Добавляет связь одним INSERT, который пропускает уже существующую строку
+    (ON CONFLICT DO NOTHING), и обновляет счётчик. Возвращает True, если
+    строка добавлена; параллельные повторы получают False, а не IntegrityError.
+    """
+    table, user_column, target_column = _columns(model)
+    ops = connection.ops
+    added = _execute(
+        f"{ops.insert_statement(ignore_conflicts=True)} {table} "
+        f"({user_column}, {target_column}) VALUES (%s, %s) "
+        f"{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}",
+        [user_id, target_id],
+    ) == 1
+    if added:
+        _changed(model, user_id, target_id, 1)
+    return added
+
+
+@transaction.atomic
+def remove_relation(model, user_id, target_id):
+    """
+    Удаляет связь одним DELETE и обновляет счётчик.
+    Возвращает True, если строка была удалена.
+    """
+    table, user_column, target_column = _columns(model)
+    removed = _execute(
+        f"DELETE FROM {table} WHERE {user_column} = %s AND {target_column} = %s",
+        [user_id, target_id],
+    ) == 1
+    if removed:
+        _changed(model, user_id, target_id, -1)
+    return removed
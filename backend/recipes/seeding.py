@@ -0,0 +1,125 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+
+from users.models import Subscription, User
+from .counters import reconcile_counters
+from .models import Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart
+from .signals import recipes_bulk_created
+
+
+def _ids(objects, fallback_queryset):
+    if connection.features.can_return_rows_from_bulk_insert:
+        return [obj.pk for obj in objects]
+    return list(fallback_queryset.order_by("pk").values_list("pk", flat=True))
+
+
+def seed_data(
+    users=100,
+    recipes=1000,
+    ingredients=500,
+    ingredients_per_recipe=8,
+    favorites_per_user=20,
+    carts_per_user=5,
+    subscriptions_per_user=10,
+    random_seed=0,
+    prefix="seed",
+    batch_size=1000,
+):
+    """
+    Заполняет базу синтетическими пользователями, ингредиентами, рецептами,
+    избранным, корзинами и подписками массовыми вставками.
+    При одинаковом random_seed данные воспроизводятся детерминированно.
+    Возвращает количество созданных строк по каждой модели.
+    """
+    rng = random.Random(random_seed)
+    password = make_password(None)
+
+    ingredient_objects = Ingredient.objects.bulk_create(
+        [
+            Ingredient(
+                name=f"{prefix} ингредиент {number}",
+                measurement_unit=rng.choice(("г", "мл", "шт.", "ст. л.")),
+            )
+            for number in range(ingredients)
+        ],
+        batch_size=batch_size,
+    )
+    ingredient_ids = _ids(
+        ingredient_objects, Ingredient.objects.filter(name__startswith=f"{prefix} ")
+    )
+
+    user_objects = User.objects.bulk_create(
+        [
+            User(
+                username=f"{prefix}_user_{number}",
+                email=f"{prefix}_user_{number}@example.com",
+                first_name="Имя",
+                last_name="Фамилия",
+                password=password,
+            )
+            for number in range(users)
+        ],
+        batch_size=batch_size,
+    )
+    user_ids = _ids(
+        user_objects, User.objects.filter(username__startswith=f"{prefix}_user_")
+    )
+
+    recipe_objects = Recipe.objects.bulk_create(
+        [
+            Recipe(
+                author_id=rng.choice(user_ids),
+                name=f"Рецепт {number}",
+                text="Описание приготовления. " * rng.randint(1, 20),
+                image="recipes/images/seed.png",
+                cooking_time=rng.randint(5, 180),
+            )
+            for number in range(recipes)
+        ],
+        batch_size=batch_size,
+    )
+    recipe_ids = _ids(recipe_objects, Recipe.objects.filter(author_id__in=user_ids))
+
+    per_recipe = min(ingredients_per_recipe, len(ingredient_ids))
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+        ),
+        batch_size=batch_size,
+    )
+
+    def pairs(per_user, targets, model, target_field):
+        rows = []
+        for user_id in user_ids:
+            candidates = rng.sample(targets, min(per_user, len(targets)))
+            rows.extend(
+                model(user_id=user_id, **{target_field: target})
+                for target in candidates
+                if not (target_field == "author_id" and target == user_id)
+            )
+        model.objects.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
+
+    counts = {
+        "users": len(user_ids),
+        "ingredients": len(ingredient_ids),
+        "recipes": len(recipe_ids),
+        "recipe_ingredients": len(recipe_ids) * per_recipe,
+        "favorites": pairs(favorites_per_user, recipe_ids, Favorite, "recipe_id"),
+        "carts": pairs(carts_per_user, recipe_ids, ShoppingCart, "recipe_id"),
+        "subscriptions": pairs(
+            subscriptions_per_user, user_ids, Subscription, "author_id"
+        ),
+    }
+    Recipe.objects.filter(pk__in=recipe_ids).update_search_vector()
+    reconcile_counters()
+    recipes_bulk_created.send(sender=Recipe)
+    return counts
@@ -0,0 +1,88 @@
+import string
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .cache import increment_counter
+from .constants import (
+    SHORT_LINK_CACHE_SIZE,
+    SHORT_LINK_ID_BITS,
+    SHORT_LINK_MULTIPLIER,
+    SHORT_LINK_OFFSET,
+)
+from .models import Recipe
+
+ALPHABET = string.digits + string.ascii_letters
+# Код начинается с буквы, чтобы не совпадать со старыми ссылками /s/<id>/.
+LETTERS = string.ascii_letters
+MODULUS = 2 ** SHORT_LINK_ID_BITS
+INVERSE = pow(SHORT_LINK_MULTIPLIER, -1, MODULUS)
+VERSION_KEY = "recipes:ids:version"
+
+
+def encode(pk):
+    """Короткий код рецепта: перемешанный идентификатор в base62."""
+    number = (pk * SHORT_LINK_MULTIPLIER + SHORT_LINK_OFFSET) % MODULUS
+    code = [LETTERS[number % len(LETTERS)]]
+    number //= len(LETTERS)
+    while number:
+        code.append(ALPHABET[number % len(ALPHABET)])
+        number //= len(ALPHABET)
+    return "".join(code)
+
+
+def decode(code):
+    """Идентификатор рецепта по коду или None, если код некорректен."""
+    if not code or code[0] not in LETTERS or any(ch not in ALPHABET for ch in code):
+        return None
+    number = 0
+    for ch in reversed(code[1:]):
+        number = number * len(ALPHABET) + ALPHABET.index(ch)
+    number = number * len(LETTERS) + LETTERS.index(code[0])
+    if number >= MODULUS:
+        return None
+    pk = (number - SHORT_LINK_OFFSET) * INVERSE % MODULUS
+    # Отбрасываются нулевые и неканонические коды (с лишними нулями в конце).
+    if not pk or encode(pk) != code:
+        return None
+    return pk
+
+
+class RecipeIdCache:
+    """
+    Процессный LRU-кеш идентификаторов существующих рецептов для коротких
+    ссылок. Хранит только найденные рецепты, поэтому новые рецепты
+    находятся запросом к базе без сброса кеша; удаление рецепта меняет
+    версию в общем кеше, и кеш очищается во всех процессах.
+    """
+
+    def __init__(self, size=SHORT_LINK_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._size = size
+        self._version = None
+        self._ids = OrderedDict()
+
+    def invalidate(self):
+        increment_counter(VERSION_KEY)
+        self._version = None
+
+    def exists(self, pk):
+        version = cache.get(VERSION_KEY, 0)
+        with self._lock:
+            if version != self._version:
+                self._ids.clear()
+                self._version = version
+            if pk in self._ids:
+                self._ids.move_to_end(pk)
+                return True
+        if not Recipe.objects.filter(pk=pk).exists():
+            return False
+        with self._lock:
+            self._ids[pk] = None
+            if len(self._ids) > self._size:
+                self._ids.popitem(last=False)
+        return True
+
+
+recipe_ids = RecipeIdCache()
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Recipe
+from .shortlinks import recipe_ids
+
+# Отправляется после массового импорта ингредиентов, который обходит
+# сигналы сохранения отдельных объектов.
+ingredients_imported = Signal()
+# Отправляется после массового создания рецептов и связанных с ними данных.
+recipes_bulk_created = Signal()
+# Отправляется после добавления или удаления избранного, покупки или подписки
+# через recipes.relations, минуя сигналы сохранения моделей.
+relation_changed = Signal()
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    """Поисковый вектор пересчитывается при каждом сохранении рецепта."""
+    Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_recipe_short_link(sender, instance, **kwargs):
+    """Короткая ссылка удалённого рецепта перестаёт открываться во всех процессах."""
+    transaction.on_commit(recipe_ids.invalidate)
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+# Имя, которое уже начинается с SHA-256: сам файл или производный от него
+# (abc….jpg, abc….thumb.webp).
+HASHED_NAME = re.compile(r"^[0-9a-f]{64}(\.|$)")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class AlreadyStored(Exception):
+    pass
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла — SHA-256 его содержимого
+    в каталоге исходного имени: recipes/images/<sha256>.jpg.
+
+    Одинаковые файлы хранятся один раз: если файл с таким именем уже есть,
+    запись пропускается и возвращается его имя. Файлы, имя которых уже
+    начинается с хеша (например, варианты картинки), сохраняются под
+    переданным именем. Один файл может использоваться несколькими
+    объектами, поэтому файлы не удаляются вместе с объектами — их удаляет
+    команда collect_media_garbage. Время изменения переиспользованного файла
+    обновляется, чтобы он считался новым.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+        directory, basename = os.path.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        return os.path.join(directory, digest.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        if not HASHED_NAME.match(os.path.basename(name)):
+            name = self.hashed_name(self.generate_filename(name), content)
+        try:
+            return super().save(name, content, max_length=max_length)
+        except AlreadyStored:
+            # Повторная ссылка на старый файл не должна попасть под удаление
+            # collect_media_garbage, пока объект ещё не сохранён.
+            self.touch(name)
+            return name.replace("\\", "/")
+
+    def touch(self, name):
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def get_available_name(self, name, max_length=None):
+        # Вызывается и перед записью, и при гонке двух одинаковых загрузок.
+        if self.exists(name):
+            raise AlreadyStored
+        return name
+
+
+def get_image_storage():
+    """Хранилище картинок рецептов и аватаров с дедупликацией по содержимому."""
+    return ContentHashStorage()
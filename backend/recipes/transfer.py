@@ -0,0 +1,334 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.db import connection, transaction
+
+from users.models import User
+from .constants import (
+    INGREDIENT_MEASUREMENT_UNIT_MAX_LENGTH,
+    INGREDIENT_NAME_MAX_LENGTH,
+    MIN_INGREDIENT_AMOUNT,
+    MIN_TIME_COOKING,
+    RECIPE_NAME_MAX_LENGTH,
+    RECIPE_TRANSFER_BATCH_SIZE,
+)
+from .counters import recount_counter
+from .importing import batches
+from .models import Ingredient, Recipe, RecipeIngredient
+from .signals import recipes_bulk_created
+
+AUTHOR_FIELDS = ("username", "email", "first_name", "last_name")
+IMAGE_FIELD = Recipe._meta.get_field("image")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dumps(item):
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def iter_export(queryset=None, with_hashes=False, batch_size=RECIPE_TRANSFER_BATCH_SIZE):
+    """
+    Выгружает рецепты в JSON Lines, по рецепту на строку. Авторы
+    и ингредиенты записываются по значениям, а не по идентификаторам,
+    картинка — путём в хранилище и, если with_hashes, SHA-256 содержимого.
+    Рецепты читаются порциями по первичному ключу, каждая порция — два запроса.
+    """
+    queryset = (queryset if queryset is not None else Recipe.objects.all()).order_by(
+        "pk"
+    )
+    last_pk = 0
+    while True:
+        recipes = list(
+            queryset.filter(pk__gt=last_pk).values_list(
+                "pk",
+                "name",
+                "text",
+                "cooking_time",
+                "image",
+                "created_at",
+                *(f"author__{field}" for field in AUTHOR_FIELDS),
+            )[:batch_size]
+        )
+        if not recipes:
+            return
+        last_pk = recipes[-1][0]
+        ingredients = defaultdict(list)
+        for recipe_id, name, unit, amount in (
+            RecipeIngredient.objects.filter(recipe_id__in=[row[0] for row in recipes])
+            .order_by("pk")
+            .values_list(
+                "recipe_id", "ingredient__name", "ingredient__measurement_unit", "amount"
+            )
+        ):
+            ingredients[recipe_id].append(
+                {"name": name, "measurement_unit": unit, "amount": amount}
+            )
+        for pk, name, text, cooking_time, image, created_at, *author in recipes:
+            item = {
+                "name": name,
+                "text": text,
+                "cooking_time": cooking_time,
+                "created_at": created_at.isoformat(),
+                "author": dict(zip(AUTHOR_FIELDS, author)),
+                "ingredients": ingredients[pk],
+                "image": image,
+            }
+            if with_hashes and image:
+                try:
+                    with IMAGE_FIELD.storage.open(image) as file:
+                        item["image_sha256"] = file_sha256(file)
+                except OSError:
+                    pass
+            yield _dumps(item)
+
+
+def _clean(line):
+    """Разбирает строку выгрузки; для некорректной строки возвращает None."""
+    try:
+        item = json.loads(line)
+        author = {field: item["author"][field] for field in AUTHOR_FIELDS}
+        recipe = {
+            "name": item["name"].strip(),
+            "text": item["text"],
+            "cooking_time": int(item["cooking_time"]),
+            "image": item.get("image") or "",
+            "image_sha256": item.get("image_sha256"),
+            "created_at": (
+                datetime.fromisoformat(item["created_at"])
+                if item.get("created_at")
+                else None
+            ),
+            "author": author,
+            "ingredients": {
+                (entry["name"].strip(), entry["measurement_unit"].strip()): int(
+                    entry["amount"]
+                )
+                for entry in item["ingredients"]
+            },
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if (
+        not recipe["name"]
+        or len(recipe["name"]) > RECIPE_NAME_MAX_LENGTH
+        or not isinstance(recipe["text"], str)
+        or recipe["cooking_time"] < MIN_TIME_COOKING
+        or not all(isinstance(value, str) and value for value in author.values())
+        or not recipe["ingredients"]
+        or any(
+            not name
+            or not unit
+            or len(name) > INGREDIENT_NAME_MAX_LENGTH
+            or len(unit) > INGREDIENT_MEASUREMENT_UNIT_MAX_LENGTH
+            or amount < MIN_INGREDIENT_AMOUNT
+            for (name, unit), amount in recipe["ingredients"].items()
+        )
+    ):
+        return None
+    return recipe
+
+
+class ImageStore:
+    """
+    Копирует картинки из каталога media_root исходного окружения
+    в хранилище под именами по SHA-256 содержимого: одинаковые файлы
+    записываются один раз, уже сохранённые — не записываются повторно.
+    Без media_root пути картинок сохраняются как есть.
+    """
+
+    def __init__(self, media_root=None):
+        self.media_root = media_root
+        self.names = {}
+        self.written = 0
+        self.reused = 0
+        self.missing = 0
+
+    def _name(self, digest, path):
+        extension = os.path.splitext(path)[1].lower()
+        return f"{IMAGE_FIELD.upload_to}{digest}{extension}"
+
+    def _copy(self, path):
+        with open(os.path.join(self.media_root, path), "rb") as file:
+            name = self._name(file_sha256(file), path)
+            if IMAGE_FIELD.storage.exists(name):
+                IMAGE_FIELD.storage.touch(name)
+                self.reused += 1
+            else:
+                file.seek(0)
+                IMAGE_FIELD.storage.save(name, File(file))
+                self.written += 1
+        return name
+
+    def resolve(self, path, digest=None):
+        if not path or self.media_root is None:
+            return path
+        if path in self.names:
+            self.reused += 1
+            return self.names[path]
+        if digest and IMAGE_FIELD.storage.exists(self._name(digest, path)):
+            name = self._name(digest, path)
+            IMAGE_FIELD.storage.touch(name)
+            self.reused += 1
+        else:
+            try:
+                name = self._copy(path)
+            except OSError:
+                # Рецепт импортируется со старым путём картинки.
+                self.missing += 1
+                name = path
+        self.names[path] = name
+        return name
+
+
+def _resolve_authors(authors):
+    """Пользователи по username; недостающие создаются без пароля."""
+    found = dict(
+        User.objects.filter(username__in=authors).values_list("username", "pk")
+    )
+    missing = [author for username, author in authors.items() if username not in found]
+    if missing:
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(password=password, **author) for author in missing],
+            ignore_conflicts=True,
+        )
+        found.update(
+            User.objects.filter(
+                username__in=[author["username"] for author in missing]
+            ).values_list("username", "pk")
+        )
+    return found
+
+
+def _resolve_ingredients(keys):
+    """Ингредиенты по названию; недостающие добавляются в каталог."""
+    names = {name for name, _ in keys}
+    found = dict(Ingredient.objects.filter(name__in=names).values_list("name", "pk"))
+    missing = {name: unit for name, unit in keys if name not in found}
+    if missing:
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in missing.items()
+            ],
+            ignore_conflicts=True,
+        )
+        found.update(
+            Ingredient.objects.filter(name__in=missing).values_list("name", "pk")
+        )
+    return found
+
+
+def _import_batch(batch, images):
+    authors = _resolve_authors(
+        {recipe["author"]["username"]: recipe["author"] for recipe in batch}
+    )
+    ingredients = _resolve_ingredients(
+        {key for recipe in batch for key in recipe["ingredients"]}
+    )
+    existing = set(
+        Recipe.objects.filter(
+            author_id__in=authors.values(),
+            name__in={recipe["name"] for recipe in batch},
+        ).values_list("author_id", "name")
+    )
+    recipes, rows = [], []
+    for recipe in batch:
+        author_id = authors.get(recipe["author"]["username"])
+        key = (author_id, recipe["name"])
+        if author_id is None or key in existing:
+            continue
+        existing.add(key)
+        rows.append(recipe)
+        recipes.append(
+            Recipe(
+                author_id=author_id,
+                name=recipe["name"],
+                text=recipe["text"],
+                cooking_time=recipe["cooking_time"],
+                image=images.resolve(recipe["image"], recipe["image_sha256"]),
+            )
+        )
+    if not recipes:
+        return 0
+    last_pk = Recipe.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    recipes = Recipe.objects.bulk_create(recipes)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        for recipe, pk in zip(
+            recipes,
+            Recipe.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True),
+        ):
+            recipe.pk = pk
+    # auto_now_add перезаписывает время публикации при вставке.
+    dated = []
+    for recipe, row in zip(recipes, rows):
+        if row["created_at"] is not None:
+            recipe.created_at = row["created_at"]
+            dated.append(recipe)
+    Recipe.objects.bulk_update(dated, ["created_at"], batch_size=100)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe_id=recipe.pk,
+            ingredient_id=ingredients[name],
+            amount=amount,
+        )
+        for recipe, row in zip(recipes, rows)
+        for (name, _), amount in row["ingredients"].items()
+    )
+    recount_counter(User, "recipes_count", {recipe.author_id for recipe in recipes})
+    Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes]).update_search_vector()
+    return len(recipes)
+
+
+def import_recipes(file, media_root=None, batch_size=RECIPE_TRANSFER_BATCH_SIZE):
+    """
+    Импортирует рецепты из выгрузки iter_export порциями, каждая
+    в своей транзакции. Недостающие авторы и ингредиенты создаются,
+    рецепты, которые у автора уже есть с тем же названием, пропускаются,
+    поэтому прерванный импорт можно запустить повторно.
+    Возвращает количество прочитанных, добавленных и пропущенных строк
+    и записанных, переиспользованных и не найденных картинок.
+    """
+    images = ImageStore(media_root)
+    total = imported = 0
+
+    def clean_rows():
+        nonlocal total
+        for line in file:
+            if not line.strip():
+                continue
+            total += 1
+            recipe = _clean(line)
+            if recipe is not None:
+                yield recipe
+
+    try:
+        for batch in batches(clean_rows(), batch_size):
+            with transaction.atomic():
+                imported += _import_batch(batch, images)
+    finally:
+        # Порции, зафиксированные до ошибки, тоже должны сбросить кеши.
+        if imported:
+            recipes_bulk_created.send(sender=Recipe)
+    return {
+        "total": total,
+        "imported": imported,
+        "skipped": total - imported,
+        "images_written": images.written,
+        "images_reused": images.reused,
+        "images_missing": images.missing,
+    }
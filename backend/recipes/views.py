@@ -1,8 +1,27 @@
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
 
-from .models import Recipe
+from .constants import SHORT_LINK_MAX_AGE
+from .shortlinks import decode, recipe_ids
 
 
-def short_link_redirect(request, pk):
-    recipe = get_object_or_404(Recipe, pk=pk)
-    return redirect(f'/recipes/{recipe.pk}')
+def recipe_redirect(pk):
+    """
+    Редирект на страницу рецепта. Ответ кешируется браузером и nginx:
+    302, а не 301, чтобы ссылка на удалённый рецепт со временем перестала
+    вести на его страницу.
+    """
+    if pk is None or not recipe_ids.exists(pk):
+        raise Http404
+    response = HttpResponseRedirect(f"/recipes/{pk}")
+    patch_cache_control(response, public=True, max_age=SHORT_LINK_MAX_AGE)
+    return response
+
+
+def short_link_redirect(request, code):
+    return recipe_redirect(decode(code))
+
+
+def legacy_short_link_redirect(request, pk):
+    """Ссылки вида /s/<id>/, выданные до появления коротких кодов."""
+    return recipe_redirect(pk)
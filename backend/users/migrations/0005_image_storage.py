@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:40
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=recipes.storage.get_image_storage, upload_to='avatars/users/', verbose_name='Иконка'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from recipes.mixins import CounterFieldsMixin
+from recipes.storage import get_image_storage
 from .constants import (
     USER_USERNAME_MAX_LENGTH,
     USER_FIRST_NAME_MAX_LENGTH,
@@ -9,7 +11,7 @@ from .constants import (
 )
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Класс для описания модели User."""
 
     username = models.CharField(
@@ -27,9 +29,21 @@ class User(AbstractUser):
         "Адрес почты", unique=True, blank=False, max_length=USER_EMAIL_MAX_LENGTH
     )
     avatar = models.ImageField(
-        "Иконка", blank=True, null=True, upload_to="avatars/users/"
+        "Иконка",
+        blank=True,
+        null=True,
+        upload_to="avatars/users/",
+        storage=get_image_storage,
+    )
+    recipes_count = models.PositiveIntegerField(
+        "Количество рецептов", default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        "Количество подписчиков", default=0, editable=False
     )
 
+    counter_fields = ("recipes_count", "subscribers_count")
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
 
@@ -37,6 +51,11 @@ class User(AbstractUser):
         ordering = ["username"]
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        indexes = [
+            models.Index(
+                fields=["-date_joined", "-id"], name="user_joined_id_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.username
@@ -61,6 +80,11 @@ class Subscription(models.Model):
     class Meta:
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="subscription_author_user_idx"
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=~models.Q(user=models.F("author")),